@@ -1,21 +1,19 @@
 from abc import ABC, abstractmethod
-import os
-import signal
-from time import sleep
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, monotonic
 from datetime import datetime, timedelta
 import atexit
 import logging
-from queue import Queue
-from typing import final
+from typing import Optional, final
 
 from .loader import load_validate_options
 from .options import AppOptions
 from .client import Client
-from .implemented_servers import ServerTypes
+from .implemented_servers import SERVER_TYPES
 from .server import Server
 from .modbus_mqtt import MqttClient
 from paho.mqtt.enums import MQTTErrorCode
-from paho.mqtt.client import MQTTMessage
 
 import sys
 
@@ -26,14 +24,19 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",  # Date format
 )
 logger = logging.getLogger(__name__)
+logging.getLogger("pymodbus").setLevel(logging.WARNING)    # connection/ transaction details from pymodbus are not needed at INFO
 
-READ_INTERVAL = 0.001
+WRITE_DEBOUNCE_SECONDS = 0.05   # repeated commands to a register within this time collapse into the last one
+WRITE_FLUSH_TIMEOUT_SECONDS = 10    # maximum wait on exit for queued writes to be written
 
 
 def exit_handler(
-    servers: list[Server], modbus_clients: list[Client], mqtt_client: MqttClient
+    servers: list[Server], modbus_clients: list[Client], mqtt_client: MqttClient, message_handler: Optional["MessageHandler"] = None
 ) -> None:
     logger.info("Exiting")
+    # write queued commands before the client connections are closed
+    if message_handler is not None:
+        message_handler.stop(WRITE_FLUSH_TIMEOUT_SECONDS)
     # publish offline availability for each server
     for server in servers:
         mqtt_client.publish_availability(False, server)
@@ -48,6 +51,15 @@ class MessageHandler:
     def __init__(self, servers: list[Server], mqtt_client: MqttClient):
         self.devices = servers
         self.mqtt_client = mqtt_client
+        self._device_by_name: dict[str, Server] = {s.name: s for s in servers}
+
+        # pending writes per (server name, register slug): (server, payload, deadline)
+        self._pending_writes: dict[tuple[str, str], tuple[Server, str, float]] = {}
+        self._pending_writes_cv = threading.Condition()
+        self._writing = False       # the writer thread is writing writes taken from _pending_writes
+        self._stopping = False      # set by stop(): write all pending writes without waiting for their deadline, then exit
+        self._write_worker = threading.Thread(target=self._write_pending, name="modbus-writer", daemon=True)
+        self._write_worker.start()
 
     def _decode_subscribed_topic(self, msg_topic: str) -> tuple[Server, str]:
         """
@@ -60,35 +72,124 @@ class MessageHandler:
             ValueError: If the command_topic format does not match any of the defined devices
 
         Returns:
-            tuple[str, str]: _description_
+            tuple[Server, str]: device and register name slug
         """
         # command_topic = f"{self.base_topic}/{server.nickname}/{slugify(register_name)}/set"
-        server_ha_display_name: str = msg_topic.split('/')[1]
-        s = None
-        for s in self.devices: 
-            if s.name == server_ha_display_name:
-                device = s
-        if s is None: raise ValueError(f"Server {server_ha_display_name} not available. Cannot write.")
-        register_name: str = msg_topic.split('/')[2]
+        parts = msg_topic.split('/', 3)
+        if len(parts) < 3:
+            raise ValueError(f"Cannot decode topic {msg_topic}. Cannot write.")
+
+        device = self._device_by_name.get(parts[1])
+        if device is None: raise ValueError(f"Server {parts[1]} not available. Cannot write.")
 
-        return (device, register_name)
+        return (device, parts[2])
 
     def decode_and_write(self, msg_topic: str, msg_payload_decoded: str) -> None:
         """
-            Finds implied register from topic, writes and updates entity state by a read back.
+            Finds implied register from topic and queues the write for the writer thread.
+
+            Returns immediately, so paho's network loop is not blocked by Modbus round trips.
+            Commands for the same register within WRITE_DEBOUNCE_SECONDS are collapsed into the last one.
         """
         # find implied register from topic
         server, register_name = self._decode_subscribed_topic(msg_topic)
 
+        with self._pending_writes_cv:
+            self._pending_writes[(server.name, register_name)] = (
+                server, msg_payload_decoded, monotonic() + WRITE_DEBOUNCE_SECONDS)
+            self._pending_writes_cv.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+            Wait until all queued writes have been written and read back.
+
+            Returns False if the writes were not finished within timeout seconds.
+        """
+        with self._pending_writes_cv:
+            return self._pending_writes_cv.wait_for(lambda: not self._pending_writes and not self._writing, timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+            Write all queued writes without waiting for their debounce deadline and stop the writer thread.
+        """
+        with self._pending_writes_cv:
+            self._stopping = True
+            self._pending_writes_cv.notify_all()
+        self._write_worker.join(timeout)
+        if self._write_worker.is_alive():
+            logger.warning("Queued writes not finished within %s seconds", timeout)
+
+    def write_and_read_back(self, server: Server, register_name: str, msg_payload_decoded: str) -> None:
+        """
+            Writes a register and updates entity state by a read back.
+        """
         # write
         server.write_registers(register_name, msg_payload_decoded)
 
         # update state by read back
-        value = server.read_registers(server.write_parameters_slug_to_name[register_name])
-        logger.info(f"Read back after write attempt {value=}")
+        parameter_name = server.write_parameters_slug_to_name[register_name]
+        value = server.read_registers(parameter_name)
+        logger.info("Read back after write attempt value=%r", value)
         self.mqtt_client.publish_to_ha(
-            register_name, value, server)
-    
+            parameter_name, value, server, force=True)
+
+    def write_many_and_read_back(self, server: Server, writes: list[tuple[str, str]]) -> None:
+        """
+            Writes several registers of a server, adjacent registers in one request, and updates entity states by read backs.
+        """
+        server.write_many(writes)
+
+        parameter_names = [server.write_parameters_slug_to_name[register_name] for register_name, _ in writes]
+        for parameter_name, value in server.read_registers_batch(parameter_names):
+            logger.info("Read back after write attempt %s value=%r", parameter_name, value)
+            self.mqtt_client.publish_to_ha(
+                parameter_name, value, server, force=True)
+
+    def _write_pending(self) -> None:
+        """ Writer thread: performs queued writes once their debounce deadline has passed.
+
+            All writes that are due are taken from the pending writes in one lock section, then written
+            without holding the lock, so incoming commands are not blocked by Modbus round trips.
+            If the writes to a server fail, they are logged and dropped.
+        """
+        while True:
+            with self._pending_writes_cv:
+                while True:
+                    while not self._pending_writes and not self._stopping:
+                        self._pending_writes_cv.wait()
+                    if not self._pending_writes:    # stopping, all writes done
+                        return
+
+                    now = monotonic()
+                    due = sorted((deadline, key, server, payload)
+                                 for key, (server, payload, deadline) in self._pending_writes.items()
+                                 if deadline <= now or self._stopping)
+                    if due:
+                        break
+                    self._pending_writes_cv.wait(min(deadline for _, _, deadline in self._pending_writes.values()) - now)
+
+                for _, key, _, _ in due:
+                    del self._pending_writes[key]
+                self._writing = True
+
+            # due writes per server, in the order the commands were last received
+            writes_by_server: dict[str, tuple[Server, list[tuple[str, str]]]] = {}
+            for _, (server_name, register_name), server, payload in due:
+                writes_by_server.setdefault(server_name, (server, []))[1].append((register_name, payload))
+
+            for server, writes in writes_by_server.values():
+                try:
+                    if len(writes) == 1:
+                        self.write_and_read_back(server, *writes[0])
+                    else:
+                        self.write_many_and_read_back(server, writes)
+                except Exception:    # drop the failed writes only, other servers and later commands are still written
+                    logger.exception("Exception while writing %s on %s. Writes dropped.", writes, server.name)
+
+            with self._pending_writes_cv:
+                self._writing = False
+                self._pending_writes_cv.notify_all()
+
 class IDeviceInstantiatorCallbacks(ABC):
     @staticmethod
     @abstractmethod
@@ -122,8 +223,10 @@ class RealDeviceInstantiator(IDeviceInstantiatorCallbacks):
 
     @staticmethod
     def instantiate_servers(OPTIONS: AppOptions, clients: list[Client]) -> list[Server]:
+        # server types are validated by loader.validate_server_implemented when the options are loaded
+        clients_by_name = {str(client): client for client in clients}
         return [
-            ServerTypes[sr.server_type].value.from_ServerOptions(sr, clients)
+            SERVER_TYPES[sr.server_type].from_ServerOptions(sr, clients_by_name)
             for sr in OPTIONS.servers
         ]
     
@@ -185,12 +288,9 @@ class App:
         self.mqtt_client.message_handler = self.message_handler.decode_and_write
 
         atexit.register(exit_handler, self.servers,
-                        self.clients, self.mqtt_client)
+                        self.clients, self.mqtt_client, self.message_handler)
 
-        sleep(READ_INTERVAL)
         self.mqtt_client.loop_start()
-        sleep(READ_INTERVAL)
-
         self.mqtt_client.ensure_connected(self.OPTIONS.mqtt_reconnect_attempts)
 
         # Publish Discovery Topics
@@ -203,68 +303,81 @@ class App:
             raise ValueError(
                 f"In loop but app servers or clients not setup up")
 
-        # every read_interval seconds, read the registers and publish to mqtt
-        while True:
-            self.mqtt_client.ensure_connected(self.OPTIONS.mqtt_reconnect_attempts)
-
-            for server in self.servers:
-                for write_register_name, _ in server.write_parameters.items():
-                    sleep(READ_INTERVAL)
-                    value = server.read_registers(write_register_name)
-                    self.mqtt_client.publish_to_ha(
-                        write_register_name, value, server)
-                logger.info(
-                    f"Published all Write parameter values for {server.name=}")
-                for register_name, details in server.parameters.items():
-                    sleep(READ_INTERVAL)
-                    value = server.read_registers(register_name)
-                    self.mqtt_client.publish_to_ha(
-                        register_name, value, server)
-                logger.info(
-                    f"Published all Read parameter values for {server.name=}")
-            if loop_once:   # for debug/ testing
-                break
-
-            logger.info(f"Blocking for {self.OPTIONS.pause_interval_seconds}s")
-            sleep(self.OPTIONS.pause_interval_seconds)
-
-            self.sleep_if_midnight()
+        # servers on different modbus clients are polled in parallel, servers sharing a client one after another
+        server_groups: dict[Client, list[Server]] = {}
+        for server in self.servers:
+            server_groups.setdefault(server.connected_client, []).append(server)
+
+        with ThreadPoolExecutor(max_workers=len(server_groups), thread_name_prefix="modbus-poll") as executor:
+            # every pause_interval_seconds, read the registers and publish to mqtt
+            while True:
+                # cycles start pause_interval_seconds apart, regardless of how long reading takes
+                deadline = monotonic() + self.OPTIONS.pause_interval_seconds
+                self.mqtt_client.ensure_connected(self.OPTIONS.mqtt_reconnect_attempts)
+
+                polls = [executor.submit(self.poll_servers, servers) for servers in server_groups.values()]
+                for poll in polls:
+                    poll.result()   # re-raises exceptions from the poll threads
+                if loop_once:   # for debug/ testing
+                    break
+
+                remaining = deadline - monotonic()
+                if remaining > 0:
+                    logger.debug("Blocking for %.3fs", remaining)
+                    sleep(remaining)
+                else:
+                    logger.warning("Poll cycle overran pause_interval_seconds by %.2fs", -remaining)
+
+                self.sleep_if_midnight()
+
+    def poll_servers(self, servers: list[Server]) -> None:
+        """ Reads all parameters of each server in turn and publishes them to mqtt. """
+        for server in servers:
+            # contiguous registers are read in a single request, see Server.read_plan. Blocks of parameters
+            # with a refresh_interval are skipped until they are due again.
+            # publish only queues the message for the mqtt network thread (loop_start), so the
+            # next block is read while the previous values are being sent.
+            for block in server.due_blocks(monotonic()):
+                self.mqtt_client.publish_many(server.read_block(block), server)
+            logger.debug("Published all parameter values for server.name=%r", server.name)
 
     def sleep_if_midnight(self) -> None:
         """
-        Sleeps if the current time is within 3 minutes before or 5 minutes after midnight.
-        Uses efficient sleep intervals instead of busy waiting.
+        Sleeps if the current time is within 3 minutes before midnight or midnight_sleep_wakeup_after minutes after midnight.
+        Sleeps once, until the end of the midnight window.
         """
-        while self.OPTIONS.midnight_sleep_enabled:
-            current_time = datetime.now()
-            is_before_midnight = current_time.hour == 23 and current_time.minute >= 57
-            is_after_midnight = current_time.hour == 0 and current_time.minute < self.OPTIONS.midnight_sleep_wakeup_after
-
-            if not (is_before_midnight or is_after_midnight):
-                break
-
-            # Calculate appropriate sleep duration
-            if is_before_midnight:
-                # Calculate time until midnight
-                next_check = (current_time + timedelta(days=1)).replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-            else:
-                # Calculate time until 5 minutes after midnight
-                next_check = current_time.replace(
-                    hour=0, minute=self.OPTIONS.midnight_sleep_wakeup_after, second=0, microsecond=0)
-
-            # Sleep until next check, but no longer than 30 seconds at a time
-            sleep_duration = min(
-                30, (next_check - current_time).total_seconds())
-            sleep(sleep_duration)
-
-
-
-
-
-if __name__ == "__main__":
-    if len(sys.argv) <= 1:  # deployed on homeassistant
+        now = datetime.now()
+        wake = _next_wake(now, self.OPTIONS)
+        if wake is not None:
+            logger.info(f"Midnight sleep until {wake}")
+            sleep((wake - now).total_seconds())
+
+
+def _next_wake(now: datetime, options: AppOptions) -> Optional[datetime]:
+    """ Returns the end of the midnight sleep window if now falls within it, otherwise None.
+
+        The window starts 3 minutes before midnight and ends options.midnight_sleep_wakeup_after minutes after midnight.
+    """
+    if not options.midnight_sleep_enabled:
+        return None
+
+    wakeup_after = timedelta(minutes=options.midnight_sleep_wakeup_after)
+    if now.hour == 23 and now.minute >= 57:
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight + wakeup_after
+    if now.hour == 0 and now.minute < options.midnight_sleep_wakeup_after:
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return midnight + wakeup_after
+    return None
+
+
+def main(argv: list[str]) -> None:
+    """ Run the add-on. Without arguments, with the Home Assistant options and real devices. With an options
+        file argument, locally, with spoofed clients and a local MQTT broker on port 1884.
+
+        exit_handler is registered with atexit in App.connect, once the clients and the MQTT client exist.
+    """
+    if len(argv) <= 1:  # deployed on homeassistant
         device_instantiator = RealDeviceInstantiator()
         app = App(device_instantiator=device_instantiator, 
                   message_handler_instantiator=MessageHandler)
@@ -281,7 +394,7 @@ if __name__ == "__main__":
                     return [SpoofClient()]
 
         device_instantiator = SpoofDeviceInstantiator()
-        app = App(device_instantiator, MessageHandler, sys.argv[1])
+        app = App(device_instantiator, MessageHandler, argv[1])
         app.OPTIONS.mqtt_host = "localhost"
         app.OPTIONS.mqtt_port = 1884
         app.OPTIONS.pause_interval_seconds = 10
@@ -292,5 +405,6 @@ if __name__ == "__main__":
         app.connect()
         app.loop(False)
 
-    # finally:
-    #     exit_handler(servers, clients, mqtt_client) TODO NB
+
+if __name__ == "__main__":
+    main(sys.argv)
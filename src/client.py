@@ -1,13 +1,36 @@
-from typing import Optional
+import socket
+import threading
+from typing import Any, Callable, Optional
 from .enums import RegisterTypes
 from .options import ModbusTCPOptions, ModbusRTUOptions
 from pymodbus.client import ModbusSerialClient, ModbusTcpClient
+from pymodbus.exceptions import ConnectionException
 from pymodbus.pdu import ExceptionResponse
 import logging
 from .options import ModbusTCPOptions, ModbusRTUOptions
-from time import sleep
+from time import sleep, time
 logger = logging.getLogger(__name__)
 
+# TCP keepalive: probe an idle connection after TCP_KEEPALIVE_IDLE seconds, every TCP_KEEPALIVE_INTERVAL seconds,
+# and drop it after TCP_KEEPALIVE_COUNT unanswered probes. Detects dead connections in ~1 min instead of the ~2 h default
+TCP_KEEPALIVE_IDLE = 30
+TCP_KEEPALIVE_INTERVAL = 10
+TCP_KEEPALIVE_COUNT = 3
+
+# Modbus exception codes and their meanings
+_MODBUS_EXC_MSG: dict[int, str] = {
+    1: "Illegal Function",
+    2: "Illegal Data Address",
+    3: "Illegal Data Value",
+    4: "Slave Device Failure",
+    5: "Acknowledge",
+    6: "Slave Device Busy",
+    7: "Negative Acknowledge",
+    8: "Memory Parity Error",
+    10: "Gateway Path Unavailable",
+    11: "Gateway Target Device Failed to Respond"
+}
+
 class ModbusException(Exception):
     def __init__(self, *args):
         super().__init__(*args)
@@ -23,6 +46,8 @@ class Client:
     def __init__(self, cl_options: ModbusTCPOptions | ModbusRTUOptions):
         self.name = cl_options.name
         self.client: ModbusSerialClient | ModbusTcpClient
+        # serialises requests from the polling loop and the MQTT command writer thread
+        self._lock = threading.Lock()
 
         if isinstance(cl_options, ModbusTCPOptions):
             self.client = ModbusTcpClient(
@@ -32,15 +57,62 @@ class Client:
                                              bytesize=cl_options.bytesize, parity='Y' if cl_options.parity else 'N',
                                              stopbits=cl_options.stopbits)
 
+    def _open(self) -> bool:
+        """ Open the pymodbus connection and tune its TCP socket. Returns True if connected.
+
+            Modbus requests are small and wait for a response, so Nagle's algorithm is disabled (TCP_NODELAY)
+            to send each request immediately instead of holding it back for more data.
+        """
+        connected: bool = self.client.connect()
+        if connected and isinstance(self.client, ModbusTcpClient):
+            sock: socket.socket = self.client.socket    # type: ignore
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, "TCP_KEEPIDLE"):     # Linux only
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, TCP_KEEPALIVE_COUNT)
+        return connected
+
+    def _execute(self, request: Callable[..., Any], **kwargs):
+        """ Run a pymodbus request on the persistent connection, serialised by the client lock.
+
+            (Re)opens the connection if it was closed. If the connection drops during the request,
+            reconnects once and retries; errors on the retry propagate to the caller.
+        """
+        with self._lock:
+            if not self.client.connected:
+                self._open()
+            if isinstance(self.client, ModbusSerialClient):
+                self._wait_silent_interval()
+            try:
+                return request(**kwargs)
+            except (ConnectionException, OSError) as e:
+                logger.warning(f"Connection to {self} lost ({e}). Reconnecting and retrying once")
+                self.client.close()
+                self._open()
+                return request(**kwargs)
+
+    def _wait_silent_interval(self) -> None:
+        """ Modbus RTU frames must be separated by 3.5 character times of bus silence. pymodbus computes this
+            interval from the baudrate (silent_interval) but sends without waiting, so sleep for what is left of it. """
+        last_frame_end = self.client.last_frame_end
+        if last_frame_end:
+            remaining = last_frame_end + self.client.silent_interval - time()   # type: ignore
+            if remaining > 0:
+                sleep(remaining)
+
     def read(self, address, count, slave_id, register_type):
         if register_type == RegisterTypes.HOLDING_REGISTER:
-            result = self.client.read_holding_registers(address=address-1,
-                                                        count=count,
-                                                        slave=slave_id)
+            result = self._execute(self.client.read_holding_registers,
+                                   address=address-1,
+                                   count=count,
+                                   slave=slave_id)
         elif register_type == RegisterTypes.INPUT_REGISTER:
-            result = self.client.read_input_registers(address=address-1,
-                                                      count=count,
-                                                      slave=slave_id)
+            result = self._execute(self.client.read_input_registers,
+                                   address=address-1,
+                                   count=count,
+                                   slave=slave_id)
         else:
             # will maybe never happen?
             logger.info(f"unsupported register type {register_type}")
@@ -68,11 +140,12 @@ class Client:
             logger.info(f"unsupported write register type {register_type}")
             raise ValueError(f"unsupported register type {register_type}")
         
-        result = self.client.write_registers(address=address-1,
-                                            values=values,
-                                            slave=slave_id)
+        result = self._execute(self.client.write_registers,
+                               address=address-1,
+                               values=values,
+                               slave=slave_id)
         
-        if result.isError():
+        if isinstance(result, ExceptionResponse):
             self._handle_error_response(result)
             raise ModbusException(f"Error writing register at address {address=} on {slave_id=}")
     
@@ -82,11 +155,12 @@ class Client:
         logger.info(f"Connecting to client {self}")
 
         for i in range(num_retries):
-            connected: bool = self.client.connect()
+            with self._lock:
+                connected = self._open()
             if connected:
                 break
 
-            logging.info(f"Couldn't connect to {self}. Retrying")
+            logger.info(f"Couldn't connect to {self}. Retrying")
             sleep(sleep_interval)
 
         if not connected:
@@ -109,22 +183,7 @@ class Client:
     def _handle_error_response(self, result):
         if isinstance(result, ExceptionResponse):
             exception_code = result.exception_code
-
-            # Modbus exception codes and their meanings
-            exception_messages = {
-                1: "Illegal Function",
-                2: "Illegal Data Address",
-                3: "Illegal Data Value",
-                4: "Slave Device Failure",
-                5: "Acknowledge",
-                6: "Slave Device Busy",
-                7: "Negative Acknowledge",
-                8: "Memory Parity Error",
-                10: "Gateway Path Unavailable",
-                11: "Gateway Target Device Failed to Respond"
-            }
-
-            error_message = exception_messages.get(
+            error_message = _MODBUS_EXC_MSG.get(
                 exception_code, "Unknown Exception")
             logger.error(
                 f"Modbus Exception Code {exception_code}: {error_message}")
@@ -151,8 +210,8 @@ class SpoofClient(Client):
         self.name = "Client1"
 
     def read(self, address, count, slave_id, register_type):
-        logger.debug(f"SPOOFING READ")
-        response = SpoofClient.SpoofResponse([73 for _ in range(count)])
+        logger.debug("SPOOFING READ")
+        response = SpoofClient.SpoofResponse([73] * count)
         return response
     
     def write(self, values: list[int], address: int, slave_id: int, register_type):
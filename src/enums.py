@@ -38,48 +38,53 @@ class DataType(Enum):
         Returns the size in bytes for fixed-size types.
         Returns None for variable-size types (UTF8).
         """
-        sizes = {
-            DataType.U16: 2,
-            DataType.I16: 2,
-            DataType.U32: 4,
-            DataType.I32: 4,
-            DataType.F32: 4,
-            DataType.F32: 4,
-            DataType.U64: 8,
-            DataType.I64: 8,
-            DataType.UTF8: None,
-        }
-        return sizes[self]
+        return _DTYPE_SIZE[self]
 
     @property
     def min_value(self) -> Optional[int]:
         """Returns the minimum value for numeric types."""
-        ranges = {
-            DataType.U16: 0,
-            DataType.U32: 0,
-            DataType.I16: -32768,  # -2^15
-            DataType.I32: -2147483648,  # -2^31
-            DataType.U64: 0,
-            DataType.I64: -18446744073709551616,
-            DataType.UTF8: None,
-        }
-        return ranges[self]
+        return _DTYPE_MIN[self]
 
     @property
     def max_value(self) -> Optional[int]:
         """Returns the maximum value for numeric types."""
-        ranges = {
-            DataType.U16: 65535,  # 2^16 - 1
-            DataType.U32: 4294967295,  # 2^32 - 1
-            DataType.I16: 32767,  # 2^15 - 1
-            DataType.I32: 2147483647,  # 2^31 - 1
-            DataType.U64: 18446744073709551615,
-            DataType.I64: 9223372036854775807,
-            DataType.UTF8: None,
-        }
-        return ranges[self]
+        return _DTYPE_MAX[self]
 
 
+# DataType lookup tables, built once instead of on every property access
+_DTYPE_SIZE: dict[DataType, Optional[int]] = {
+    DataType.B17: 2,    # bit flag within a single register
+    DataType.U16: 2,
+    DataType.I16: 2,
+    DataType.U32: 4,
+    DataType.I32: 4,
+    DataType.F32: 4,
+    DataType.F64: 8,
+    DataType.U64: 8,
+    DataType.I64: 8,
+    DataType.UTF8: None,
+}
+
+_DTYPE_MIN: dict[DataType, Optional[int]] = {
+    DataType.U16: 0,
+    DataType.U32: 0,
+    DataType.I16: -32768,  # -2^15
+    DataType.I32: -2147483648,  # -2^31
+    DataType.U64: 0,
+    DataType.I64: -9223372036854775808,  # -2^63
+    DataType.UTF8: None,
+}
+
+_DTYPE_MAX: dict[DataType, Optional[int]] = {
+    DataType.U16: 65535,  # 2^16 - 1
+    DataType.U32: 4294967295,  # 2^32 - 1
+    DataType.I16: 32767,  # 2^15 - 1
+    DataType.I32: 2147483647,  # 2^31 - 1
+    DataType.U64: 18446744073709551615,  # 2^64 - 1
+    DataType.I64: 9223372036854775807,  # 2^63 - 1
+    DataType.UTF8: None,
+}
+
 # https://www.home-assistant.io/integrations/sensor#device-class
 
 
@@ -233,6 +238,7 @@ class Parameter(ParameterReq, total=False):
     remarks: str
     state_class: Literal["measurement", "total", "total_increasing"]
     value_template: str
+    refresh_interval: float     # minimum seconds between reads. Read every poll cycle if not set, see server.READ_ONCE
 
     # all oarameters are required to have these fields
 WriteParameterReq = TypedDict(
@@ -254,6 +260,7 @@ class WriteParameter(WriteParameterReq, total=False):
     max: float
     payload_off: int
     payload_on: int
+    refresh_interval: float     # see Parameter.refresh_interval
 
 if __name__ == "__main__":
     print(DataType.U16.min_value)
@@ -1,21 +1,31 @@
-def slugify(text: str) -> str:
-    return text.replace(' ', '_').replace('(', '').replace(')', '').replace('/', 'OR').replace('&', ' ').replace(':', '').replace('.', '').lower()
-
 import logging
+from time import sleep
 from typing import Any
 logger = logging.getLogger(__name__)
 
-def with_retries(fun, *args, max_tries=3, exception=Exception, msg=f"Exception. Retrying") -> Any:
+__all__ = ['slugify', 'with_retries']
+
+# single-pass replacements for slugify. '&' becomes a space, which is not turned into '_' (matching the previous chained replaces)
+_SLUG_TABLE = str.maketrans({' ': '_', '(': '', ')': '', '/': 'OR', '&': ' ', ':': '', '.': ''})
+
+def slugify(text: str) -> str:
+    return text.translate(_SLUG_TABLE).lower()
+
+RETRY_BACKOFF_SECONDS = 0.05    # wait after the first failed attempt of with_retries, doubled after each further failure
+
+def with_retries(fun, *args, exception: type[BaseException], max_tries=3, msg=f"Exception. Retrying", backoff=RETRY_BACKOFF_SECONDS) -> Any:
     """Call fun() max_tries number of times, until it executes without an exception. 
     
     If max_tries is exceeded, the exception raised on the last call is raised. 
+    Other exceptions, e.g. programming errors, are raised immediately without retrying.
 
     Args:
         fun (_type_): Callable
         *args: Arguments passed to fun
-        exception (_type_, optional): Exception to catch. Defaults to Exception.
+        exception (_type_): Exception to catch. Required, so callers only retry the failures they expect.
         msg (_type_, optional): Error message logged between retries. Defaults to f"Exception. Retrying".
         max_tries (int, optional): Number of times to attempt executing fun(). Defaults to 3.
+        backoff (float, optional): Seconds to wait after the first failed attempt, doubled after each further failure. Defaults to RETRY_BACKOFF_SECONDS.
 
     Raises:
         exception: If max_tries is exceeded. The exception raised on the last call.
@@ -23,18 +33,11 @@ def with_retries(fun, *args, max_tries=3, exception=Exception, msg=f"Exception.
     Returns:
         Any: value returned by fun()
     """
-       
-    msg += f" {fun}."
-    val: Any
-
     for i in range(max_tries):
         try:
-            val = fun(*args)
-            break
-        except exception as e:
-            logger.error(msg)
+            return fun(*args)
+        except exception:
+            logger.error("%s %s.", msg, fun)
             if i == max_tries-1: 
-                raise e
-            continue
-
-    return val
+                raise
+            sleep(backoff * 2**i)
@@ -1,14 +1,23 @@
 from dataclasses import dataclass
 import json
 import os
+from functools import lru_cache
+from pathlib import Path
 import logging
 import yaml
 from cattrs import structure, unstructure, Converter
 from .options import *
-from .implemented_servers import ServerTypes
+from .implemented_servers import SERVER_TYPES
 
 logger = logging.getLogger(__name__)
 
+try:
+    from yaml import CSafeLoader as YamlLoader    # libyaml bindings
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+_converter = Converter()    # reused so the generated AppOptions structure hooks are built once
+
 """
     Validation:
     schema already validates most types and required fields
@@ -26,20 +35,22 @@ def validate_names(names: list) -> None:
     """
     Verify unique alphanumeric names for clients and servers of options. Used as unique identifiers.
     """
-    if len(set(names)) != len(names):
-        raise ValueError(f"Device/ Client names must be unique")
-
-    if not all([c.isalnum() for c in names]):
-        raise ValueError(f"Client names must be alphanumeric")
+    seen = set()
+    for name in names:
+        if not name.isalnum():
+            raise ValueError(f"Client names must be alphanumeric: {name}")
+        if name in seen:
+            raise ValueError(f"Device/ Client names must be unique: {name}")
+        seen.add(name)
 
 
 def validate_server_implemented(servers: list):
-    """Validate that the specified server type is specified in implemented servers enum."""
-    for server in servers:
-        if server.server_type not in [t.name for t in ServerTypes]:
-            raise ValueError(
-                f"Server type {server.server_type} not defined in implemented_servers.ServerTypes"
-            )
+    """Validate that the specified server types are registered in implemented_servers.SERVER_TYPES."""
+    unknown = {server.server_type for server in servers} - SERVER_TYPES.keys()
+    if unknown:
+        raise ValueError(
+            f"Server type {', '.join(sorted(unknown))} not defined in implemented_servers.SERVER_TYPES"
+        )
 
 
 def validate_options(opts: AppOptions) -> None:
@@ -58,32 +69,51 @@ def read_json(json_rel_path):
 
 def read_yaml(json_rel_path):
     with open(json_rel_path) as file:
-        data = yaml.load(file, Loader=yaml.FullLoader)["options"]
+        data = yaml.load(file, Loader=YamlLoader)
     return data
 
 
+def read_yaml_options(json_rel_path):
+    """ Options section of an add-on config.yaml """
+    return read_yaml(json_rel_path)["options"]
+
+
+# options file suffix -> reader
+OPTIONS_READERS = {
+    ".json": read_json,
+    ".yaml": read_yaml_options,
+    ".yml": read_yaml_options,
+}
+
+
+@lru_cache(maxsize=4)
+def _read_options_cached(json_rel_path, read_options, mtime_ns):
+    """ Parsed options file, reused until the file's modification time changes. """
+    return read_options(json_rel_path)
+
+
 def load_options(json_rel_path="/data/options.json") -> AppOptions:
     """Load server, client configurations and connection specs as dicts from options json."""
-    converter = Converter()
-
     logger.info(
         f"Attempting to read configuration json at path {os.path.join(os.getcwd(), json_rel_path)}"
     )
 
     # Homeassistant add-ons parse the user confi.yaml into a json.
     # Support yaml parsing for testing purposes.
-    if os.path.exists(json_rel_path):
-        if json_rel_path[-4:] == "json":
-            data = read_json(json_rel_path)
-        elif json_rel_path[-4:] == "yaml":
-            data = read_yaml(json_rel_path)
-    else:
+    read_options = OPTIONS_READERS.get(Path(json_rel_path).suffix.lower())
+    if read_options is None:
+        raise ValueError(f"Config options must be a .json or .yaml file, got {json_rel_path}")
+
+    try:
+        data = _read_options_cached(json_rel_path, read_options, os.stat(json_rel_path).st_mtime_ns)
+    except FileNotFoundError:
         logger.info("ConfigLoader error")
         logger.info(os.path.join(os.getcwd(), json_rel_path))
         raise FileNotFoundError(
-            f"Config options json/yaml not found at {os.path.join(os.getcwd(), json_rel_path)}")
+            f"Config options json/yaml not found at {os.path.join(os.getcwd(), json_rel_path)}") from None
 
-    opts = converter.structure(data, AppOptions)
+    # structured on every call, so callers never share (and mutate) one AppOptions
+    opts = _converter.structure(data, AppOptions)
     return opts
 
 
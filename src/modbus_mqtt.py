@@ -1,20 +1,64 @@
 import os
 import signal
-from typing import Callable
+from typing import Any, Callable, Optional
 import paho.mqtt.client as mqtt
 from paho.mqtt.enums import CallbackAPIVersion
 import json
+import math
 import logging
 
 from .helpers import slugify
 from .options import AppOptions
 
-from random import getrandbits
-from time import time, sleep
-from queue import Queue
+from time import sleep, monotonic
+from uuid import uuid4
 
 logger = logging.getLogger(__name__)
-# RECV_Q: Queue = Queue()
+
+FORCE_REPUBLISH_INTERVAL = 300  # seconds. Unchanged values are republished after this interval
+CONNECT_POLL_INITIAL = 0.005    # seconds. First wait while polling for the broker connection, doubled after each poll
+CONNECT_POLL_MAX = 0.2          # seconds. Upper bound of the connection poll wait
+CONNECT_ATTEMPT_SECONDS = 1     # seconds of waiting counted as one reconnect attempt
+
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode   # compact discovery payloads, one encoder for all messages
+
+
+
+def _same_value(last: Any, value: Any) -> bool:
+    """ True if value equals the last published value. Floats within a relative tolerance of 1e-9 count as equal. """
+    if last == value:
+        return True
+    return isinstance(value, float) and isinstance(last, float) and math.isclose(last, value, rel_tol=1e-9)
+
+
+# paho callbacks, shared by all clients. paho passes the MqttClient instance as client
+def _on_connect(client, userdata, connect_flags, reason_code, properties):
+    if reason_code == 0:
+        logger.info(f"Connected to MQTT broker.")
+        client._last_published.clear()    # republish all states after (re)connecting
+    else:
+        logger.info(
+            f"Not connected to MQTT broker.\nReturn code: {reason_code=}")
+
+
+def _on_disconnect(client,
+                   userdata,
+                   disconnect_flags,
+                   reason,
+                   properties):
+    logger.error(f"Disconnected from MQTT broker, {reason=}\n{disconnect_flags=}\n{properties=}")
+    logger.info(f"Stopping all threads")
+    os.kill(os.getpid(), signal.SIGINT)
+
+
+def _on_message(client, userdata, msg):
+    logger.info("Received message on MQTT")
+    try: 
+        client.message_handler(msg.topic, msg.payload.decode('utf-8'))
+
+    except Exception as e:
+        logger.error(f"Exception while handling received message. Stop Process. \n {e}")
+        os.kill(os.getpid(), signal.SIGINT)
 
 
 class MqttClient(mqtt.Client):
@@ -22,51 +66,24 @@ class MqttClient(mqtt.Client):
         paho MQTT abstraction for home assistant
     """
     def __init__(self, options: AppOptions) -> None:
-        def generate_uuid():
-            random_part = getrandbits(64)
-            # Get current timestamp in milliseconds
-            timestamp = int(time() * 1000)
-            node = getrandbits(48)  # Simulating a network node (MAC address)
-
-            uuid_str = f'{timestamp:08x}-{random_part >> 32:04x}-{random_part & 0xFFFF:04x}-{node >> 24:04x}-{node & 0xFFFFFF:06x}'
-            return uuid_str
-
-        uuid = generate_uuid()
-        super().__init__(CallbackAPIVersion.VERSION2, f"modbus-{uuid}")
+        super().__init__(CallbackAPIVersion.VERSION2, f"modbus-{uuid4().hex}")
         self.username_pw_set(options.mqtt_user, options.mqtt_password)
         self.base_topic = options.mqtt_base_topic
         self.ha_discovery_topic = options.mwtt_ha_discovery_topic
 
-        def on_connect(client, userdata, connect_flags, reason_code, properties):
-            if reason_code == 0:
-                logger.info(f"Connected to MQTT broker.")
-            else:
-                logger.info(
-                    f"Not connected to MQTT broker.\nReturn code: {reason_code=}")
-
-        def on_disconnect(client,
-                        userdata,
-                        disconnect_flags,
-                        reason,
-                        properties):
-            logger.error(f"Disconnected from MQTT broker, {reason=}\n{disconnect_flags=}\n{properties=}")
-            logger.info(f"Stopping all threads")
-            os.kill(os.getpid(), signal.SIGINT)
-
-        def on_message(client, userdata, msg):
-            logger.info("Received message on MQTT")
-            try: 
-                self.message_handler(msg.topic, msg.payload.decode('utf-8'))
-
-            except Exception as e:
-                logger.error(f"Exception while handling received message. Stop Process. \n {e}")
-                os.kill(os.getpid(), signal.SIGINT)
+        # last published (value, monotonic timestamp) per (server name, register name)
+        self._last_published: dict[tuple[str, str], tuple[Any, float]] = {}
+        # state topic per (server name, register name). Filled when publishing discovery topics
+        self._state_topics: dict[tuple[str, str], str] = {}
+        # slugified register names, shared by the discovery, command and state topics of all servers
+        self._slugs: dict[str, str] = {}
 
-        self.on_connect = on_connect
-        self.on_disconnect = on_disconnect
-        self.on_message = on_message
+        self.on_connect = _on_connect
+        self.on_disconnect = _on_disconnect
+        self.on_message = _on_message
 
-        self.message_handler = Callable[[str, str], None]
+        # called from paho's network thread with (topic, decoded payload) of every received message. Set by App.connect
+        self.message_handler: Optional[Callable[[str, str], None]] = None
 
     def publish_discovery_topics(self, server) -> None:
         # TODO check if more separation from server is necessary/ possible
@@ -92,62 +109,119 @@ class MqttClient(mqtt.Client):
 
         parameters = server.parameters
 
+        # topic prefixes shared by all registers of this server
+        item_prefix = f"{self.base_topic}/{nickname}/"
+        sensor_prefix = f"{self.ha_discovery_topic}/sensor/{nickname}/"
+        unique_id_prefix = f"{nickname}_"
+
+        # build all discovery messages first, then queue them for the network thread in a single pass
+        discovery_messages: list[tuple[str, str]] = []
+        command_topics: list[tuple[str, int]] = []     # (topic, qos) of all command topics, subscribed in one request
+
         for register_name, details in parameters.items():
-            state_topic = f"{self.base_topic}/{nickname}/{slugify(register_name)}/state"
+            slug = self._slug(register_name)
+            state_topic = self._state_topic(register_name, server)
             discovery_payload = {
                 "name": register_name,
-                "unique_id": f"{nickname}_{slugify(register_name)}",
+                "unique_id": unique_id_prefix + slug,
                 "state_topic": state_topic,
                 "availability_topic": availability_topic,
                 "device": device,
                 # "device_class": details["device_class"].value,
                 "unit_of_measurement": details["unit"],
             }
-            if details["device_class"] is not None:
-                discovery_payload["device_class"] = details["device_class"].value
-            state_class = details.get("state_class", False)
+            device_class = details["device_class"]
+            if device_class is not None:
+                discovery_payload["device_class"] = device_class.value
+            state_class = details.get("state_class")
             if state_class:
                 discovery_payload['state_class'] = state_class
                 
-            if details.get("value_template") is not None:
-                discovery_payload.update(value_template=details["value_template"])
+            value_template = details.get("value_template")
+            if value_template is not None:
+                discovery_payload["value_template"] = value_template
                 
-            discovery_topic = f"{self.ha_discovery_topic}/sensor/{nickname}/{slugify(register_name)}/config"
-
-            self.publish(discovery_topic, json.dumps(
-                discovery_payload), retain=True)
-
-        self.publish_availability(True, server)
+            discovery_topic = f"{sensor_prefix}{slug}/config"
+            discovery_messages.append((discovery_topic, _encode_json(discovery_payload)))
 
         for register_name, details in server.write_parameters.items():
-            item_topic = f"{self.base_topic}/{nickname}/{slugify(register_name)}"
+            slug = self._slug(register_name)
+            item_topic = item_prefix + slug
             discovery_payload = {
                 # required
-                "command_topic": item_topic + f"/set", 
-                "state_topic": item_topic + f"/state",
+                "command_topic": item_topic + "/set", 
+                "state_topic": self._state_topic(register_name, server),
                 # optional
                 "name": register_name,
-                "unique_id": f"{nickname}_{slugify(register_name)}",
+                "unique_id": unique_id_prefix + slug,
                 "unit_of_measurement": details["unit"],
                 "availability_topic": availability_topic,
                 "device": device
             }
 
-            if details.get("min") is not None and details.get("max") is not None:
-                discovery_payload.update(min=details["min"], max=details["max"])
-            if details.get("payload_off") is not None and details.get("payload_on") is not None:
-                discovery_payload.update(payload_off=details["payload_off"], payload_on=details["payload_on"])
+            minimum, maximum = details.get("min"), details.get("max")
+            if minimum is not None and maximum is not None:
+                discovery_payload.update(min=minimum, max=maximum)
+            payload_off, payload_on = details.get("payload_off"), details.get("payload_on")
+            if payload_off is not None and payload_on is not None:
+                discovery_payload.update(payload_off=payload_off, payload_on=payload_on)
 
-            discovery_topic = f"{self.ha_discovery_topic}/{details['ha_entity_type'].value}/{nickname}/{slugify(register_name)}/config"
-            self.publish(discovery_topic, json.dumps(discovery_payload), retain=True)
+            discovery_topic = f"{self.ha_discovery_topic}/{details['ha_entity_type'].value}/{nickname}/{slug}/config"
+            discovery_messages.append((discovery_topic, _encode_json(discovery_payload)))
+            command_topics.append((discovery_payload["command_topic"], 1))
 
-            # subscribe to write topics
-            self.subscribe(discovery_payload["command_topic"])
+        for discovery_topic, payload in discovery_messages:
+            self.publish(discovery_topic, payload, qos=0, retain=True)
 
-    def publish_to_ha(self, register_name, value, server):
-        nickname = server.name
-        state_topic = f"{self.base_topic}/{nickname}/{slugify(register_name)}/state"
-        msg_info = self.publish(state_topic, value, qos=1)  # , retain=True)
+        self.publish_availability(True, server)
+
+        # subscribe to write topics
+        if command_topics:
+            self.subscribe(command_topics)
+
+    def publish_to_ha(self, register_name, value, server, force: bool = False):
+        """ Publish a register value to its state topic.
+
+            Skipped if the value is unchanged since the last publish, unless force is set or
+            FORCE_REPUBLISH_INTERVAL has passed since the value was last published.
+        """
+        self.publish_many([(register_name, value)], server, force)
+
+    def publish_many(self, values: list[tuple[str, Any]], server, force: bool = False) -> None:
+        """ Publish (register name, value) pairs of a server, e.g. all values of a read block, as in publish_to_ha.
+
+            The clock and the publish caches are looked up once for the whole batch.
+        """
+        now = monotonic()
+        last_published = self._last_published
+        server_name = server.name
+        for register_name, value in values:
+            key = (server_name, register_name)
+            last = last_published.get(key)
+            if not force and last is not None and _same_value(last[0], value) and now - last[1] < FORCE_REPUBLISH_INTERVAL:
+                continue
+            last_published[key] = (value, now)
+
+            # telemetry is sent without broker acknowledgement (qos 0) and retained for HA to show the last value after a restart.
+            # Unchanged values are only republished after FORCE_REPUBLISH_INTERVAL, but qos 0 is only lost with the connection,
+            # and _on_connect clears last_published, so all states are republished after reconnecting. Availability and commands keep qos 1
+            self.publish(self._state_topic(register_name, server), value, qos=0, retain=True)
+
+    def _state_topic(self, register_name, server) -> str:
+        """ Return the state topic of a server register, computed once per register. """
+        key = (server.name, register_name)
+        state_topic = self._state_topics.get(key)
+        if state_topic is None:
+            state_topic = f"{self.base_topic}/{server.name}/{self._slug(register_name)}/state"
+            self._state_topics[key] = state_topic
+        return state_topic
+
+    def _slug(self, register_name: str) -> str:
+        """ Return the slugified register name, computed once per name. """
+        slug = self._slugs.get(register_name)
+        if slug is None:
+            slug = self._slugs[register_name] = slugify(register_name)
+        return slug
             
 
     def publish_availability(self, avail, server):
@@ -158,16 +232,21 @@ class MqttClient(mqtt.Client):
         
 
     def ensure_connected(self, max_attempts: int = 3) -> None:
-        """Block while not connected to the broker. Retry every second, for _max_attempts_, before stopping the process.
+        """Block while not connected to the broker. Poll with exponential backoff, from CONNECT_POLL_INITIAL up to CONNECT_POLL_MAX,
+        for _max_attempts_ * CONNECT_ATTEMPT_SECONDS, before stopping the process.
         """ 
-        attempt_num = 1
+        if self.is_connected():
+            return
+
+        deadline = monotonic() + max_attempts * CONNECT_ATTEMPT_SECONDS
+        delay = CONNECT_POLL_INITIAL
+        logger.info(f"Not connected to mqtt broker, wait for connection. {max_attempts=}")
 
         while not self.is_connected():
-            if attempt_num > max_attempts:
+            if monotonic() > deadline:
                 logger.info(f"Not connected to mqtt broker after {max_attempts=}. Kill process")
                 os.kill(os.getpid(), signal.SIGINT)
 
-            logger.info(f"Not connected to mqtt broker, sleep 1s and retry. {attempt_num=}")
-
-            sleep(1)
+            sleep(delay)
+            delay = min(delay * 2, CONNECT_POLL_MAX)
         logger.info(f"Connected to MQTT broker")
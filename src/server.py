@@ -1,14 +1,102 @@
 from abc import abstractmethod, ABC
+from dataclasses import dataclass, field
+from functools import partial
 import logging
-from typing import Any, Optional, TypedDict
+import math
+from typing import Any, Callable, Mapping, NamedTuple, Optional, TypedDict
 
 from .helpers import slugify, with_retries
 from .enums import DataType, HAEntityType, RegisterTypes, Parameter, DeviceClass, WriteParameter
-from .client import Client, ModbusException
+from .client import Client, ExceptionResponse, ModbusException
 from .options import ServerOptions
 
 logger = logging.getLogger(__name__)
 
+MAX_READ_COUNT = 125    # Modbus limit on the number of registers in a single read request (FC03/ FC04)
+BLOCK_REJECTED_EXCEPTION_CODES = (2, 3)  # Illegal Data Address/ Value: the device does not allow reading the span of a block
+READ_ONCE = math.inf    # refresh_interval of parameters that never change, e.g. nameplate values. Read in the first poll cycle only
+
+_DEVICE_CLASS_ROUNDING: dict[DeviceClass, int] = {    # TODO define in deviceClass type
+    DeviceClass.REACTIVE_POWER: 0,
+    DeviceClass.ENERGY: 1,
+    DeviceClass.FREQUENCY: 1,
+    DeviceClass.POWER_FACTOR: 1,
+    DeviceClass.APPARENT_POWER: 0, 
+    DeviceClass.CURRENT: 1,
+    DeviceClass.VOLTAGE: 0,
+    DeviceClass.POWER: 0
+}
+
+
+def _rounding_digits(unit: Optional[str], device_class: Optional[DeviceClass]) -> int:
+    """ Number of decimals kept after scaling a value of the given unit and device class. """
+    if unit and unit.startswith('k'): # starts with kilo
+        return 1    # temp. add more precision to fields in kilo- watt/var/va
+    return _DEVICE_CLASS_ROUNDING.get(device_class, 2)   # type: ignore
+
+
+class PlanEntry(NamedTuple):
+    """ Fields of a parameter needed to decode it from a ReadBlock, extracted once when the plan is built. """
+    name: str
+    offset: int     # offset of the parameter in the block
+    reg_count: int  # number of registers of the parameter
+    dtype: DataType
+    multiplier: float
+    ndigits: int    # decimals kept after scaling, see _rounding_digits
+    decode: Optional[Callable[[list[int]], Any]] = None  # bound by Server.build_read_plan, see Server._decoder
+
+
+@dataclass
+class ReadBlock:
+    """ Span of registers of a single register type, fetched with one Modbus read request.
+
+        entries holds a PlanEntry for every parameter covered by the block.
+        The block is read again refresh_interval seconds after its last read, see Server.due_blocks().
+    """
+    register_type: RegisterTypes
+    start: int
+    count: int
+    entries: list[PlanEntry] = field(default_factory=list)
+    refresh_interval: float = 0     # seconds. 0: every poll cycle
+    next_read: float = 0            # monotonic time the block is due
+
+
+def plan_reads(parameters: Mapping[str, Parameter | WriteParameter], gap_threshold: int = 0) -> list[ReadBlock]:
+    """ Group parameters into ReadBlocks of (near-)contiguous registers.
+
+        Parameters are sorted by (register_type, refresh_interval, addr) and greedily merged into the current block while
+        they share a refresh interval, the unused registers between them do not exceed gap_threshold and the block stays within MAX_READ_COUNT.
+
+    Args:
+        parameters (Mapping[str, Parameter | WriteParameter]): parameter names and parameter objects
+        gap_threshold (int, optional): Maximum number of unused registers read to join two parameters. Defaults to 0.
+
+    Returns:
+        list[ReadBlock]: read blocks in (register_type, refresh_interval, address) order
+    """
+    ordered = sorted(parameters.items(),
+                     key=lambda item: (item[1]["register_type"].value, item[1].get("refresh_interval", 0), item[1]["addr"]))
+
+    blocks: list[ReadBlock] = []
+    block: Optional[ReadBlock] = None
+    for name, param in ordered:
+        addr, count, register_type = param["addr"], param["count"], param["register_type"]
+        refresh_interval = param.get("refresh_interval", 0)
+
+        if (block is None
+                or register_type != block.register_type
+                or refresh_interval != block.refresh_interval
+                or addr - (block.start + block.count) > gap_threshold
+                or addr + count - block.start > MAX_READ_COUNT):
+            block = ReadBlock(register_type, addr, count, refresh_interval=refresh_interval)
+            blocks.append(block)
+
+        block.count = max(block.count, addr + count - block.start)   # parameters may overlap
+        block.entries.append(PlanEntry(name, addr - block.start, count, param["dtype"], param["multiplier"],
+                                       _rounding_digits(param.get("unit"), param.get("device_class"))))
+
+    return blocks
+
 
 class Server(ABC):
     """
@@ -25,6 +113,10 @@ class Server(ABC):
         self.connected_client: Client = connected_client
 
         self._model: str = "unknown"
+        self._read_plan: Optional[list[ReadBlock]] = None
+        # parameter name -> (address, register type, PlanEntry) for single parameter reads, see _compiled_read()
+        self._compiled_reads: dict[str, tuple[int, RegisterTypes, PlanEntry]] = {}
+        self._write_parameters_slug_to_name: Optional[dict[str, str]] = None
 
         logger.info(f"Server {self.name} set up.")
 
@@ -53,9 +145,10 @@ class Server(ABC):
 
     @property
     def write_parameters_slug_to_name(self) -> dict[str, str]:
-        """ Return a dictionary of mapping slugs to writeparameter names."""
-        write_parameters_slug_to_name: dict[str, str] = {slugify(name):name for name in self.write_parameters.copy()}
-        return write_parameters_slug_to_name
+        """ Return a dictionary of mapping slugs to writeparameter names. Built on first use; write parameters are fixed after setup."""
+        if self._write_parameters_slug_to_name is None:
+            self._write_parameters_slug_to_name = {slugify(name): name for name in self.write_parameters}
+        return self._write_parameters_slug_to_name
 
     @abstractmethod
     def read_model(self) -> str:
@@ -131,12 +224,134 @@ class Server(ABC):
         response = self.connected_client.read(
             address, count, slave_id, register_type)
 
-        if response.isError():
+        if isinstance(response, ExceptionResponse):
             self.connected_client._handle_error_response(response)
             available = False
 
         return available
 
+    # maximum number of unused registers read to join two parameters into one request. Override if the device allows it
+    read_gap_threshold: int = 0
+
+    @property
+    def read_plan(self) -> list[ReadBlock]:
+        """ Return the ReadBlocks covering all write parameters and parameters. Built on first use if build_read_plan() was not called. """
+        if self._read_plan is None:
+            self.build_read_plan()
+        return self._read_plan  # type: ignore
+
+    def build_read_plan(self) -> None:
+        """ Group write parameters and parameters into ReadBlocks of contiguous registers.
+            Must be called again if the parameters change, e.g. after setup_valid_registers_for_model(). """
+        self._read_plan = self._bind_decoders(plan_reads(self.write_parameters, self.read_gap_threshold)
+                                              + plan_reads(self.parameters, self.read_gap_threshold))
+        self._compiled_reads.clear()
+        logger.info(f"Server {self.name}: {len(self.parameters) + len(self.write_parameters)} parameters in {len(self._read_plan)} read requests")
+
+    def due_blocks(self, now: float) -> list[ReadBlock]:
+        """ Return the blocks of the read plan that are due at monotonic time now, and schedule their next read. """
+        due = []
+        for block in self.read_plan:
+            if block.next_read <= now:
+                block.next_read = now + block.refresh_interval
+                due.append(block)
+        return due
+
+    def _bind_decoders(self, blocks: list[ReadBlock]) -> list[ReadBlock]:
+        """ Set the decoder of every entry of the blocks, see _decoder(). """
+        for block in blocks:
+            block.entries = [entry._replace(decode=self._decoder(entry.dtype)) for entry in block.entries]
+        return blocks
+
+    def read_registers_batch(self, parameter_names: list[str]) -> list[tuple[str, Any]]:
+        """
+        Read several parameters, adjacent registers with a single request. See plan_reads() and read_block().
+
+            Parameters:
+            -----------
+                - parameter_names: list[str]: slave parameter name strings as defined in register map
+
+            Returns:
+            -----------
+                - list of (parameter name, decoded value), in register order
+        """
+        selected = {}
+        for parameter_name in parameter_names:
+            param = self.parameters.get(parameter_name, self.write_parameters.get(parameter_name))  # type: ignore
+            if param is None:
+                raise ValueError(f"No parameter {parameter_name=} for server {self.name} defined. Attempt to read.")
+            selected[parameter_name] = param
+
+        values: list[tuple[str, Any]] = []
+        for block in self._bind_decoders(plan_reads(selected, self.read_gap_threshold)):
+            values += self.read_block(block)
+        return values
+
+    def read_block(self, block: ReadBlock) -> list[tuple[str, Any]]:
+        """
+        Read a ReadBlock with a single request and decode every parameter in it.
+
+            Falls back to reading the parameters one by one if the device rejects the block read.
+            If the device rejects the span of the block, the block is split for later cycles, see _split_block().
+
+            Returns:
+            -----------
+                - list of (parameter name, decoded value)
+        """
+        logger.debug("Reading block (%s) from address=%s, count=%s, modbus_id=%s",
+                     block.register_type, block.start, block.count, self.modbus_id)
+
+        result = self.connected_client.read(
+            block.start, block.count, self.modbus_id, block.register_type)
+
+        if isinstance(result, ExceptionResponse):
+            self.connected_client._handle_error_response(result)
+            logger.warning(f"Error reading block at address={block.start}, count={block.count} on {self.name}. Reading parameters individually.")
+            if result.exception_code in BLOCK_REJECTED_EXCEPTION_CODES:
+                self._split_block(block)
+            return [(entry.name, self.read_registers(entry.name)) for entry in block.entries]
+
+        registers = result.registers
+        return [(name, self._value_from_registers(registers[offset:offset + reg_count], decode, multiplier, ndigits))   # type: ignore
+                for name, offset, reg_count, _, multiplier, ndigits, decode in block.entries]
+
+    def _split_block(self, block: ReadBlock) -> None:
+        """ Replace a block in the read plan by one block per parameter, so the rejected request is not repeated every cycle. """
+        if len(block.entries) < 2 or self._read_plan is None:
+            return
+        index = next((i for i, b in enumerate(self._read_plan) if b is block), None)
+        if index is None:
+            return
+
+        split = [ReadBlock(block.register_type, block.start + entry.offset, entry.reg_count, [entry._replace(offset=0)],
+                           block.refresh_interval, block.next_read)
+                 for entry in block.entries]
+        self._read_plan = self._read_plan[:index] + split + self._read_plan[index + 1:]
+        logger.info(f"Server {self.name}: split block at address={block.start}, count={block.count} into {len(split)} read requests")
+
+    # DataType -> decoder of the registers of one parameter. Implementations list their decoders here, so
+    # read plan entries call them directly instead of dispatching on dtype in _decoded() for every value
+    _decoders: dict[DataType, Callable[[list[int]], Any]] = {}
+
+    def _decoder(self, dtype: DataType) -> Callable[[list[int]], Any]:
+        """ Return the decoder for registers of dtype. Falls back to _decoded() for types missing from _decoders. """
+        decoder = self._decoders.get(dtype)
+        if decoder is None:
+            decoder = partial(self._decoded, dtype=dtype)
+        return decoder
+
+    def _value_from_registers(self, registers: list[int], decode: Callable[[list[int]], Any], multiplier: float, ndigits: int):
+        """ Decode the registers of a parameter, scale by its multiplier and round to ndigits. """
+        val = decode(registers)
+        if multiplier != 1:
+            val *= multiplier
+        if isinstance(val, float):  # rounding an int to ndigits >= 0 is a no-op
+            val = round(val, ndigits)
+        if logger.isEnabledFor(logging.DEBUG):    # called for every value read, one level check instead of two
+            logger.debug("Raw register begin value: %s, decoded value = %s", registers[0], val)
+
+        return val
+
     def read_registers(self, parameter_name: str):
         """ 
         Read a group of registers (parameter) using pymodbus
@@ -147,77 +362,51 @@ class Server(ABC):
             -----------
                 - parameter_name: str: slave parameter name string as defined in register map
         """
-        device_class_to_rounding: dict[DeviceClass, int] = {    # TODO define in deviceClass type
-            DeviceClass.REACTIVE_POWER: 0,
-            DeviceClass.ENERGY: 1,
-            DeviceClass.FREQUENCY: 1,
-            DeviceClass.POWER_FACTOR: 1,
-            DeviceClass.APPARENT_POWER: 0, 
-            DeviceClass.CURRENT: 1,
-            DeviceClass.VOLTAGE: 0,
-            DeviceClass.POWER: 0
-        }
-        param = self.parameters.get(parameter_name, self.write_parameters.get(parameter_name))  # type: ignore
-        if param is None:
-            logger.info(f"No parameter {parameter_name=} for server {self.name} defined. Attempt to read.")
-            raise ValueError(f"No parameter {parameter_name=} for server {self.name} defined. Attempt to read.")
-
-        address = param["addr"]
-        dtype = param["dtype"]
-        multiplier = param["multiplier"]
-        # count = param.get('count', dtype.size // 2) #TODO
-        count = param["count"]  # TODO
-        unit = param["unit"]
-        device_class = param.get("device_class")
+        address, register_type, (_, _, reg_count, dtype, multiplier, ndigits, decode) = self._compiled_read(parameter_name)
         modbus_id = self.modbus_id
-        register_type = param["register_type"]
 
-        # TODO count
-        logger.debug(
-            f"Reading param {parameter_name} ({register_type}) of {dtype=} from {address=}, {multiplier=}, {count=}, {self.modbus_id=}")
+        logger.debug("Reading param %s (%s) of dtype=%s from address=%s, multiplier=%s, count=%s, modbus_id=%s",
+                     parameter_name, register_type, dtype, address, multiplier, reg_count, modbus_id)
 
         result = self.connected_client.read(
-            address, count, modbus_id, register_type)
+            address, reg_count, modbus_id, register_type)
 
-        if result.isError():
+        if isinstance(result, ExceptionResponse):
             self.connected_client._handle_error_response(result)
             raise Exception(f"Error reading register {parameter_name}")
 
-        logger.debug(f"Raw register begin value: {result.registers[0]}")
-        val = self._decoded(result.registers, dtype)
-        if multiplier != 1:
-            val *= multiplier
-        if device_class is not None and isinstance(val, int) or isinstance(val, float):
-            if unit and unit.startswith('k'): # starts with kilo
-                val = round(val, 1) # temp. add more precision to fields in kilo- watt/var/va
-            else:
-                val = round(
-                    val, device_class_to_rounding.get(device_class, 2))
-        logger.debug(f"Decoded Value = {val} {unit}")
-
-        return val
+        return self._value_from_registers(result.registers, decode, multiplier, ndigits)  # type: ignore
+
+    def _compiled_read(self, parameter_name: str) -> tuple[int, RegisterTypes, PlanEntry]:
+        """ Return (address, register type, PlanEntry) of a parameter, built on first use and cleared by build_read_plan(). """
+        compiled = self._compiled_reads.get(parameter_name)
+        if compiled is None:
+            param = self.parameters.get(parameter_name, self.write_parameters.get(parameter_name))  # type: ignore
+            if param is None:
+                logger.info(f"No parameter {parameter_name=} for server {self.name} defined. Attempt to read.")
+                raise ValueError(f"No parameter {parameter_name=} for server {self.name} defined. Attempt to read.")
+
+            dtype = param["dtype"]
+            entry = PlanEntry(parameter_name, 0, param["count"], dtype, param["multiplier"],
+                              _rounding_digits(param.get("unit"), param.get("device_class")), self._decoder(dtype))
+            compiled = self._compiled_reads[parameter_name] = (param["addr"], param["register_type"], entry)
+        return compiled
     
-    def write_registers(self, parameter_name_slug: str, value: Any, modbus_id_override: Optional[int]=None) -> None:
+    def _encode_write(self, parameter_name_slug: str, value: Any) -> tuple[str, WriteParameter, Any, list[int]]:
         """ 
-        Write a group of registers (parameter) using pymodbus
-
-        Requires implementation of the abstract method 'Server._encoded()'
+        Convert a command payload for a write parameter to register values.
 
         Finds correct write register name using mapping from Server.write_registers_slug_to_name
+
+            Returns:
+            -----------
+                - (parameter name, parameter, scaled value, encoded register values)
         """
         parameter_name = self.write_parameters_slug_to_name[parameter_name_slug]
         param: WriteParameter = self.write_parameters[parameter_name]
 
-        address = param["addr"]
         dtype = param["dtype"]
         multiplier = param["multiplier"]
-        count = param["count"]  # TODO
-        if modbus_id_override is not None: 
-            modbus_id = modbus_id_override
-        else:
-            modbus_id = self.modbus_id
-        register_type = param["register_type"]
-        unit = param["unit"]
 
         if param["ha_entity_type"] == HAEntityType.SWITCH:
             value = int(value, base=0) # interpret string as integer literal. supports auto detecting base
@@ -225,13 +414,11 @@ class Server(ABC):
             value = float(value)
             if multiplier != 1:
                 value /= multiplier
-        print(value, dtype)
-        values = self._encoded(value, dtype)
-
-        logger.info(
-            f"Writing {values} to param {parameter_name} ({register_type}) of {dtype=} from {address=}, {multiplier=}, {count=}, {modbus_id=}")
+        logger.debug("Encoding value=%s of %s as dtype=%s", value, parameter_name, dtype)
+        return parameter_name, param, value, self._encoded(value, dtype)
 
-        # attempt to write to the register 3 times
+    def _write_with_retries(self, values: list[int], address: int, modbus_id: int, register_type: RegisterTypes, parameter_name: str) -> bool:
+        """ Write register values, attempting 3 times. Returns False if all attempts failed. """
         try:
             with_retries(self.connected_client.write,
                         values, address, modbus_id, register_type,
@@ -239,22 +426,94 @@ class Server(ABC):
                         msg = f"Error writing register {parameter_name}")
         except ModbusException as e:
             logger.error(f"Failure to write after 3 attempts. Continuing")
+            return False
+        return True
+
+    def write_registers(self, parameter_name_slug: str, value: Any, modbus_id_override: Optional[int]=None) -> None:
+        """ 
+        Write a group of registers (parameter) using pymodbus
+
+        Requires implementation of the abstract method 'Server._encoded()'
+
+        Finds correct write register name using mapping from Server.write_registers_slug_to_name
+        """
+        parameter_name, param, value, values = self._encode_write(parameter_name_slug, value)
+
+        address = param["addr"]
+        dtype = param["dtype"]
+        multiplier = param["multiplier"]
+        count = param["count"]  # TODO
+        if modbus_id_override is not None: 
+            modbus_id = modbus_id_override
+        else:
+            modbus_id = self.modbus_id
+        register_type = param["register_type"]
+        unit = param["unit"]
+
+        logger.info(
+            f"Writing {values} to param {parameter_name} ({register_type}) of {dtype=} from {address=}, {multiplier=}, {count=}, {modbus_id=}")
+
+        # attempt to write to the register 3 times
+        if not self._write_with_retries(values, address, modbus_id, register_type, parameter_name):
             return
 
         logger.info(f"Wrote {value=} {unit=} as {values=} to {parameter_name}.")
 
+    def write_many(self, writes: list[tuple[str, Any]]) -> None:
+        """
+        Write several parameters. Parameters at adjacent addresses are combined into a single write request.
+
+            Writes are made in the order given. A parameter joins the previous request if it directly precedes or follows
+            the registers of that request. If a combined request fails, its parameters are written individually.
+
+            Parameters:
+            -----------
+                - writes: list of (parameter name slug, value)
+        """
+        groups: list[list[tuple[str, WriteParameter, Any, list[int]]]] = []
+        for slug, value in writes:
+            e = self._encode_write(slug, value)
+            if groups:
+                group = groups[-1]
+                first, last = group[0][1], group[-1][1]
+                if last["register_type"] == e[1]["register_type"]:
+                    if last["addr"] + last["count"] == e[1]["addr"]:
+                        group.append(e)
+                        continue
+                    if e[1]["addr"] + e[1]["count"] == first["addr"]:
+                        group.insert(0, e)
+                        continue
+            groups.append([e])
+
+        for group in groups:
+            names = ", ".join(name for name, _, _, _ in group)
+            values = [v for _, _, _, encoded_values in group for v in encoded_values]
+            address = group[0][1]["addr"]
+            register_type = group[0][1]["register_type"]
+
+            logger.info(f"Writing {values} to params {names} ({register_type}) from {address=}, modbus_id={self.modbus_id}")
+            if self._write_with_retries(values, address, self.modbus_id, register_type, names):
+                logger.info(f"Wrote {values=} to {names}.")
+            elif len(group) > 1:
+                logger.warning(f"Error writing {names} in one request on {self.name}. Writing parameters individually.")
+                for name, param, value, encoded_values in group:
+                    if self._write_with_retries(encoded_values, param["addr"], self.modbus_id, param["register_type"], name):
+                        logger.info(f"Wrote {value=} as {encoded_values=} to {name}.")
+
     def connect(self):
         if not self.is_available():
             logger.error(f"Server {self.name} not available")
             raise ConnectionError()
         self.set_model()
         self.setup_valid_registers_for_model()
+        self._write_parameters_slug_to_name = None
+        self.build_read_plan()
 
     @classmethod
     def from_ServerOptions(
         cls,
         opts: ServerOptions,
-        clients: list[Client]
+        clients: list[Client] | dict[str, Client]
     ):
         """
         Initialises modbus_mqtt.server.Server from modbus_mqtt.loader.ServerOptions object
@@ -262,20 +521,24 @@ class Server(ABC):
         Parameters:
         -----------
             - sr_options: modbus_mqtt.loader.ServerOptions - options as read from config json
-            - clients: list[modbus_mqtt.client.Client] - list of all TCP/Serial clients connected to machine
+            - clients: list[modbus_mqtt.client.Client] - list of all TCP/Serial clients connected to machine,
+                or a dict of client name to Client, built once when instantiating many servers
         """
         name = opts.name
         serial = opts.serialnum
         modbus_id: int = opts.modbus_id  # modbus slave_id
+        connected_client = cls._connected_client(opts, clients)
+
+        return cls(name, serial, modbus_id, connected_client)
 
+    @staticmethod
+    def _connected_client(opts: ServerOptions, clients: list[Client] | dict[str, Client]) -> Client:
+        """ Return the client named in the server options. """
+        if not isinstance(clients, dict):
+            clients = {str(client): client for client in clients}
         try:
-            idx = [str(client) for client in clients].index(
-                opts.connected_client
-            )  # TODO ugly
-        except ValueError:
+            return clients[opts.connected_client]
+        except KeyError:
             raise ValueError(
-                f"Client {opts.connected_client} from server {name} config not defined in client list"
-            )
-        connected_client = clients[idx]
-
-        return cls(name, serial, modbus_id, connected_client)
+                f"Client {opts.connected_client} from server {opts.name} config not defined in client list"
+            ) from None
@@ -1,12 +1,12 @@
 from typing import TypedDict, final
-from .server import Server
+from .server import READ_ONCE, Server
 from .enums import HAEntityType, RegisterTypes, DataType, Parameter, DeviceClass, WriteParameter
 from pymodbus.client import ModbusSerialClient
-import struct
 import logging
 
 logger = logging.getLogger(__name__)
 
+
 @final
 class SungrowInverter(Server):
     """
@@ -52,11 +52,11 @@ class SungrowInverter(Server):
         "SG5KTL-MT", "SG6KTL-MT", "SG8KTL-M", "SG10KTL-M", "SG10KTL-MT", "SG12KTL-M", "SG15KTL-M", "SG17KTL-M","SG20KTL-M"
     ]
 
-    limited_params = {
-        'Total Apparent Power': total_apparant_power_supported_models,
-        'Total Power Yields (Increased Accuracy)': total_power_yields_increased_accuracy_supported_models,
-        'Grid Frequency (Increased Accuracy)': grid_freq_increased_accuracy_suported_models,
-        'PID Work State': pid_work_state_supported_models
+    limited_params: dict[str, frozenset[str]] = {
+        'Total Apparent Power': frozenset(total_apparant_power_supported_models),
+        'Total Power Yields (Increased Accuracy)': frozenset(total_power_yields_increased_accuracy_supported_models),
+        'Grid Frequency (Increased Accuracy)': frozenset(grid_freq_increased_accuracy_suported_models),
+        'PID Work State': frozenset(pid_work_state_supported_models)
 
         # 'Export power limitation': export_limitation_supported_models,
         # 'Export power limitation value': export_limitation_supported_models,
@@ -107,9 +107,9 @@ class SungrowInverter(Server):
     # }
     input_registers: dict[str, Parameter] = {
         # Non-measurement values (no state_class needed)
-        'Serial Number': {'addr': 4990, 'count': 10, 'dtype': DataType.UTF8, 'multiplier': 1, 'unit': '', 'device_class': DeviceClass.ENUM, 'register_type': RegisterTypes.INPUT_REGISTER},
-        'Device Type Code': {'addr': 5000, 'count': 1, 'dtype': DataType.U16, 'multiplier': 1, 'unit': '', 'device_class': DeviceClass.ENUM, 'register_type': RegisterTypes.INPUT_REGISTER},
-        'Nominal Active Power': {'addr': 5001, 'count': 1, 'dtype': DataType.U16, 'multiplier': 0.1, 'unit': 'kW', 'device_class': DeviceClass.POWER, 'register_type': RegisterTypes.INPUT_REGISTER},
+        'Serial Number': {'addr': 4990, 'count': 10, 'dtype': DataType.UTF8, 'multiplier': 1, 'unit': '', 'device_class': DeviceClass.ENUM, 'register_type': RegisterTypes.INPUT_REGISTER, 'refresh_interval': READ_ONCE},
+        'Device Type Code': {'addr': 5000, 'count': 1, 'dtype': DataType.U16, 'multiplier': 1, 'unit': '', 'device_class': DeviceClass.ENUM, 'register_type': RegisterTypes.INPUT_REGISTER, 'refresh_interval': READ_ONCE},
+        'Nominal Active Power': {'addr': 5001, 'count': 1, 'dtype': DataType.U16, 'multiplier': 0.1, 'unit': 'kW', 'device_class': DeviceClass.POWER, 'register_type': RegisterTypes.INPUT_REGISTER, 'refresh_interval': READ_ONCE},
         'Output Type': {'addr': 5002, 'count': 1, 'dtype': DataType.U16, 'multiplier': 1, 'unit': '', 'device_class': DeviceClass.ENUM, 'register_type': RegisterTypes.INPUT_REGISTER},
 
         # Energy measurements (total and daily/monthly values)
@@ -139,7 +139,7 @@ class SungrowInverter(Server):
         # 'Work State': {'addr': 5038, 'count': 1, 'dtype': DataType.U16, 'multiplier': 1, 'unit': '', 'device_class': DeviceClass.ENUM, 'register_type': RegisterTypes.INPUT_REGISTER},
 
         # Power measurements
-        'Nominal Reactive Power': {'addr': 5049, 'count': 1, 'dtype': DataType.U16, 'multiplier': 0.1, 'unit': 'kvar', 'device_class': DeviceClass.REACTIVE_POWER, 'register_type': RegisterTypes.INPUT_REGISTER},
+        'Nominal Reactive Power': {'addr': 5049, 'count': 1, 'dtype': DataType.U16, 'multiplier': 0.1, 'unit': 'kvar', 'device_class': DeviceClass.REACTIVE_POWER, 'register_type': RegisterTypes.INPUT_REGISTER, 'refresh_interval': READ_ONCE},
         'Array Insulation Resistance': {'addr': 5071, 'count': 1, 'dtype': DataType.U16, 'multiplier': 1, 'unit': 'kΩ',  'device_class': None, 'register_type': RegisterTypes.INPUT_REGISTER},
         'Active Power Regulation Setpoint': {'addr': 5077, 'count': 2, 'dtype': DataType.U32, 'multiplier': 1, 'unit': 'W', 'device_class': DeviceClass.POWER, 'register_type': RegisterTypes.INPUT_REGISTER},
         'Reactive Power Regulation Setpoint': {'addr': 5079, 'count': 2, 'dtype': DataType.I32, 'multiplier': 1, 'unit': 'var', 'device_class': DeviceClass.REACTIVE_POWER, 'register_type': RegisterTypes.INPUT_REGISTER},
@@ -805,45 +805,54 @@ class SungrowInverter(Server):
         return True
 
     def is_available(self):
-        self.verify_serialnum()
-        return super().is_available(register_name="Device Type Code")
+        # reading the serial number already requires a response from the device. Device Type Code is read by read_model()
+        return self.verify_serialnum()
 
 
     @staticmethod
-    def _decoded(registers, dtype):
-        def _decode_u16(registers):
-            """ Unsigned 16-bit big-endian to int """
-            return registers[0]
-        
-        def _decode_s16(registers):
-            """ Signed 16-bit big-endian to int """
-            sign = 0xFFFF if registers[0] & 0x1000 else 0
-            packed = struct.pack('>HH', sign, registers[0])
-            return struct.unpack('>i', packed)[0]
-
-        def _decode_u32(registers):
-            """ Unsigned 32-bit mixed-endian word"""
-            packed = struct.pack('>HH', registers[1], registers[0])
-            return struct.unpack('>I', packed)[0]
-        
-        def _decode_s32(registers):
-            """ Signed 32-bit mixed-endian word"""
-            packed = struct.pack('>HH', registers[1], registers[0])
-            return struct.unpack('>i', packed)[0]
+    def _decode_u16(registers):
+        """ Unsigned 16-bit big-endian to int """
+        return registers[0]
+    
+    @staticmethod
+    def _decode_s16(registers):
+        """ Signed 16-bit big-endian to int """
+        value = registers[0]
+        return value - 0x10000 if value & 0x8000 else value
 
-        def _decode_utf8(registers):
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.STRING)
-        
-        def _decode_bit17(registers):
-            return (registers[0] & 0x20000) >> 17
-        
-        if dtype == DataType.UTF8: return _decode_utf8(registers)
-        elif dtype == DataType.U16: return _decode_u16(registers)
-        elif dtype == DataType.U32: return _decode_u32(registers)
-        elif dtype == DataType.I16: return _decode_s16(registers)
-        elif dtype == DataType.I32: return _decode_s32(registers)
-        elif dtype == DataType.B17: return _decode_bit17(registers)
-        else: raise NotImplementedError(f"Data type {dtype} decoding not implemented")
+    @staticmethod
+    def _decode_u32(registers):
+        """ Unsigned 32-bit mixed-endian word"""
+        return (registers[1] << 16) | registers[0]
+    
+    @staticmethod
+    def _decode_s32(registers):
+        """ Signed 32-bit mixed-endian word"""
+        value = (registers[1] << 16) | registers[0]
+        return value - 0x100000000 if value & 0x80000000 else value
+
+    @staticmethod
+    def _decode_utf8(registers):
+        return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.STRING)
+    
+    @staticmethod
+    def _decode_bit17(registers):
+        return (registers[0] & 0x20000) >> 17
+
+    _decoders = {
+        DataType.UTF8: _decode_utf8,
+        DataType.U16: _decode_u16,
+        DataType.U32: _decode_u32,
+        DataType.I16: _decode_s16,
+        DataType.I32: _decode_s32,
+        DataType.B17: _decode_bit17,
+    }
+
+    @staticmethod
+    def _decoded(registers, dtype):
+        decoder = SungrowInverter._decoders.get(dtype)
+        if decoder is None: raise NotImplementedError(f"Data type {dtype} decoding not implemented")
+        return decoder(registers)
 
     @staticmethod
     def _encoded(value, dtype):
@@ -1,14 +1,14 @@
 from typing import Any, Optional, final
 
 from .helpers import slugify
-from .server import Server
+from .server import READ_ONCE, Server
 from pymodbus.client import ModbusSerialClient
-import struct
 from .enums import DeviceClass, HAEntityType, Parameter, RegisterTypes, DataType, WriteParameter
 import logging
 
 logger = logging.getLogger(__name__)
 
+
 @final
 class SungrowLogger(Server):
     # modbus slave id is usually 247
@@ -23,7 +23,8 @@ class SungrowLogger(Server):
             'unit': '',
             'device_class': DeviceClass.ENUM,
             'remarks': '0x0705 Logger3000, 0x0710 Logger1000, 0x0718 Logger4000',
-            'register_type': RegisterTypes.INPUT_REGISTER},
+            'register_type': RegisterTypes.INPUT_REGISTER,
+            'refresh_interval': READ_ONCE},
         'Protocol number': {
             'addr': 8001,
             'count': 2,
@@ -31,7 +32,8 @@ class SungrowLogger(Server):
             'multiplier': 1,
             'unit': '',
             'device_class': DeviceClass.ENUM,
-            'register_type': RegisterTypes.INPUT_REGISTER},
+            'register_type': RegisterTypes.INPUT_REGISTER,
+            'refresh_interval': READ_ONCE},
         'Communication protocol version': {
             'addr': 8003,
             'count': 2,
@@ -39,7 +41,8 @@ class SungrowLogger(Server):
             'multiplier': 1,
             'unit': '',
             'device_class': DeviceClass.ENUM,
-            'register_type': RegisterTypes.INPUT_REGISTER},
+            'register_type': RegisterTypes.INPUT_REGISTER,
+            'refresh_interval': READ_ONCE},
         'Total devices connected': {
             'addr': 8005,
             'count': 1,
@@ -497,48 +500,57 @@ class SungrowLogger(Server):
     #     return super().write_registers(parameter_name_slug, value, modbus_id_override=0)
 
     @staticmethod
-    def _decoded(registers, dtype):
-        def _decode_u16(registers):
-            """ Unsigned 16-bit big-endian to int """
-            return registers[0]
-        
-        def _decode_s16(registers):
-            """ Signed 16-bit big-endian to int """
-            sign = 0xFFFF if registers[0] & 0x1000 else 0
-            packed = struct.pack('>HH', sign, registers[0])
-            return struct.unpack('>i', packed)[0]
+    def _decode_u16(registers):
+        """ Unsigned 16-bit big-endian to int """
+        return registers[0]
+    
+    @staticmethod
+    def _decode_s16(registers):
+        """ Signed 16-bit big-endian to int """
+        value = registers[0]
+        return value - 0x10000 if value & 0x8000 else value
 
-        def _decode_u32(registers):
-            """ Unsigned 32-bit mixed-endian word"""
-            packed = struct.pack('>HH', registers[1], registers[0])
-            return struct.unpack('>I', packed)[0]
-        
-        def _decode_s32(registers):
-            """ Signed 32-bit mixed-endian word"""
-            packed = struct.pack('>HH', registers[1], registers[0])
-            return struct.unpack('>i', packed)[0]
-        
-        def _decode_u64(registers):
-            """ Unsigned 64-bit big-endian word"""
-            packed = struct.pack('>HHHH', *registers)
-            return struct.unpack('>Q', packed)[0]
-        
-        def _decode_s64(registers):
-            """ Signed 64-bit big-endian word"""
-            packed = struct.pack('>HHHH', *registers)
-            return struct.unpack('>q', packed)[0]
+    @staticmethod
+    def _decode_u32(registers):
+        """ Unsigned 32-bit mixed-endian word"""
+        return (registers[1] << 16) | registers[0]
+    
+    @staticmethod
+    def _decode_s32(registers):
+        """ Signed 32-bit mixed-endian word"""
+        value = (registers[1] << 16) | registers[0]
+        return value - 0x100000000 if value & 0x80000000 else value
+    
+    @staticmethod
+    def _decode_u64(registers):
+        """ Unsigned 64-bit big-endian word"""
+        return (registers[0] << 48) | (registers[1] << 32) | (registers[2] << 16) | registers[3]
+    
+    @staticmethod
+    def _decode_s64(registers):
+        """ Signed 64-bit big-endian word"""
+        value = (registers[0] << 48) | (registers[1] << 32) | (registers[2] << 16) | registers[3]
+        return value - (1 << 64) if value & (1 << 63) else value
 
-        def _decode_utf8(registers):
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.STRING)
-        
-        if dtype == DataType.UTF8: return _decode_utf8(registers)
-        elif dtype == DataType.U16: return _decode_u16(registers)
-        elif dtype == DataType.U32: return _decode_u32(registers)
-        elif dtype == DataType.U64: return _decode_u64(registers)
-        elif dtype == DataType.I16: return _decode_s16(registers)
-        elif dtype == DataType.I32: return _decode_s32(registers)
-        elif dtype == DataType.I64: return _decode_s64(registers)
-        else: raise NotImplementedError(f"Data type {dtype} decoding not implemented")
+    @staticmethod
+    def _decode_utf8(registers):
+        return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.STRING)
+
+    _decoders = {
+        DataType.UTF8: _decode_utf8,
+        DataType.U16: _decode_u16,
+        DataType.U32: _decode_u32,
+        DataType.U64: _decode_u64,
+        DataType.I16: _decode_s16,
+        DataType.I32: _decode_s32,
+        DataType.I64: _decode_s64,
+    }
+
+    @staticmethod
+    def _decoded(registers, dtype):
+        decoder = SungrowLogger._decoders.get(dtype)
+        if decoder is None: raise NotImplementedError(f"Data type {dtype} decoding not implemented")
+        return decoder(registers)
 
     
     @staticmethod
@@ -278,7 +278,7 @@ class AcrelMeter(Server):
     def from_ServerOptions(
         cls,
         opts: ServerOptions | SungrowMeterOptions, # opts will be SungrowMeterOptions if config has the ratios
-        clients: list[Client]
+        clients: list[Client] | dict[str, Client]
     ):
         name = opts.name
         serial = opts.serialnum
@@ -286,12 +286,7 @@ class AcrelMeter(Server):
 
         try:
             # Find the client instance this server connects to
-            client_match = [c for c in clients if str(c) == opts.connected_client]
-            if not client_match:
-                raise ValueError(
-                    f"Client '{opts.connected_client}' for server '{name}' not found in defined clients."
-                )
-            connected_client = client_match[0]
+            connected_client = cls._connected_client(opts, clients)
         except ValueError as e:
             logger.error(e)
             raise
@@ -377,32 +372,44 @@ class AcrelMeter(Server):
         return super().is_available(register_name=register_name)
     
     @staticmethod
-    def _decoded(registers, dtype):
-        def _decode_u16(registers):
-            """ Unsigned 16-bit big-endian to int """
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.UINT16)
-        
-        def _decode_s16(registers):
-            """ Signed 16-bit big-endian to int """
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.INT16)
+    def _decode_u16(registers):
+        """ Unsigned 16-bit big-endian to int """
+        return registers[0]
+    
+    @staticmethod
+    def _decode_s16(registers):
+        """ Signed 16-bit big-endian to int """
+        value = registers[0]
+        return value - 0x10000 if value & 0x8000 else value
 
-        def _decode_u32(registers):
-            """ Unsigned 32-bit big-endian word"""
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.UINT32)
-        
-        def _decode_s32(registers):
-            """ Signed 32-bit mixed-endian word"""
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.INT32)
+    @staticmethod
+    def _decode_u32(registers):
+        """ Unsigned 32-bit big-endian word"""
+        return (registers[0] << 16) | registers[1]
+    
+    @staticmethod
+    def _decode_s32(registers):
+        """ Signed 32-bit big-endian word"""
+        value = (registers[0] << 16) | registers[1]
+        return value - 0x100000000 if value & 0x80000000 else value
+
+    @staticmethod
+    def _decode_utf8(registers):
+        return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.STRING)
 
-        def _decode_utf8(registers):
-            return ModbusSerialClient.convert_from_registers(registers=registers, data_type=ModbusSerialClient.DATATYPE.STRING)
+    _decoders = {
+        DataType.UTF8: _decode_utf8,
+        DataType.U16: _decode_u16,
+        DataType.U32: _decode_u32,
+        DataType.I16: _decode_s16,
+        DataType.I32: _decode_s32,
+    }
 
-        if dtype == DataType.UTF8: return _decode_utf8(registers)
-        elif dtype == DataType.U16: return _decode_u16(registers)
-        elif dtype == DataType.U32: return _decode_u32(registers)
-        elif dtype == DataType.I16: return _decode_s16(registers)
-        elif dtype == DataType.I32: return _decode_s32(registers)
-        else: raise NotImplementedError(f"Data type {dtype} decoding not implemented")
+    @staticmethod
+    def _decoded(registers, dtype):
+        decoder = AcrelMeter._decoders.get(dtype)
+        if decoder is None: raise NotImplementedError(f"Data type {dtype} decoding not implemented")
+        return decoder(registers)
         
     @staticmethod
     def _encoded(value, dtype):
@@ -1,4 +1,6 @@
 import unittest
+from datetime import datetime
+from types import SimpleNamespace
 import src.app as app
 from src.client import SpoofClient
 import logging
@@ -29,5 +31,88 @@ class TestApp(unittest.TestCase):
         self.app.loop(loop_once=True)
 
 
+class TestMessageHandler(unittest.TestCase):
+
+    class FakeServer:
+        name = "SG1"
+        write_parameters_slug_to_name = {"power_limitation_setting": "Power limitation setting"}
+
+        def __init__(self):
+            self.writes = []
+
+        def write_registers(self, slug, value):
+            if value == "fail":
+                raise ConnectionError("write failed")
+            self.writes.append((slug, value))
+
+        def read_registers(self, name):
+            return self.writes[-1][1]
+
+    class FakeMqttClient:
+        def __init__(self):
+            self.published = []
+
+        def publish_to_ha(self, register_name, value, server, force=False):
+            self.published.append((register_name, value))
+
+    def test_debounced_write(self):
+        server = self.FakeServer()
+        mqtt_client = self.FakeMqttClient()
+        handler = app.MessageHandler([server], mqtt_client)  # type: ignore
+
+        for value in ("10", "20", "30"):
+            handler.decode_and_write("modbus/SG1/power_limitation_setting/set", value)
+        self.assertTrue(handler.flush(timeout=5))
+
+        self.assertEqual(server.writes, [("power_limitation_setting", "30")])
+        self.assertEqual(mqtt_client.published, [("Power limitation setting", "30")])
+
+    def test_stop_writes_pending_writes(self):
+        server = self.FakeServer()
+        handler = app.MessageHandler([server], self.FakeMqttClient())  # type: ignore
+        handler.decode_and_write("modbus/SG1/power_limitation_setting/set", "10")
+        handler.stop(timeout=5)
+
+        self.assertFalse(handler._write_worker.is_alive())
+        self.assertEqual(server.writes, [("power_limitation_setting", "10")])
+
+    def test_failed_write_dropped(self):
+        server = self.FakeServer()
+        handler = app.MessageHandler([server], self.FakeMqttClient())  # type: ignore
+        handler.decode_and_write("modbus/SG1/power_limitation_setting/set", "fail")
+        self.assertTrue(handler.flush(timeout=5))
+        handler.decode_and_write("modbus/SG1/power_limitation_setting/set", "10")
+        self.assertTrue(handler.flush(timeout=5))
+
+        self.assertTrue(handler._write_worker.is_alive())
+        self.assertEqual(server.writes, [("power_limitation_setting", "10")])
+
+    def test_unknown_server(self):
+        handler = app.MessageHandler([self.FakeServer()], self.FakeMqttClient())  # type: ignore
+        with self.assertRaises(ValueError):
+            handler.decode_and_write("modbus/SG2/power_limitation_setting/set", "1")
+
+
+class TestNextWake(unittest.TestCase):
+    def setUp(self):
+        self.options = SimpleNamespace(midnight_sleep_enabled=True, midnight_sleep_wakeup_after=10)
+
+    def test_before_midnight(self):
+        self.assertEqual(app._next_wake(datetime(2024, 12, 31, 23, 58, 30), self.options),
+                         datetime(2025, 1, 1, 0, 10))
+
+    def test_after_midnight(self):
+        self.assertEqual(app._next_wake(datetime(2025, 1, 1, 0, 4), self.options),
+                         datetime(2025, 1, 1, 0, 10))
+
+    def test_outside_window(self):
+        self.assertIsNone(app._next_wake(datetime(2025, 1, 1, 0, 10), self.options))
+        self.assertIsNone(app._next_wake(datetime(2025, 1, 1, 23, 56), self.options))
+
+    def test_disabled(self):
+        self.options.midnight_sleep_enabled = False
+        self.assertIsNone(app._next_wake(datetime(2025, 1, 1, 0, 4), self.options))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from src.client import Client
+from src.enums import RegisterTypes
+from src.options import ModbusTCPOptions
+from pymodbus.exceptions import ConnectionException
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class FakeModbusClient:
+    """ Stands in for the pymodbus client: the first `failures` requests raise ConnectionException. """
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.connected = True
+        self.connects = 0
+        self.closes = 0
+
+    def connect(self):
+        self.connects += 1
+        self.connected = True
+        return True
+
+    def close(self):
+        self.closes += 1
+        self.connected = False
+
+    def read_input_registers(self, address, count, slave):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionException("connection reset")
+        return [address, count, slave]
+
+
+class TestClientReconnect(unittest.TestCase):
+
+    def make_client(self, failures):
+        client = Client(ModbusTCPOptions(name="TCP1", type="TCP", host="localhost", port=502))
+        client.client = FakeModbusClient(failures)  # type: ignore
+        return client
+
+    def test_reconnects_once_on_dropped_connection(self):
+        client = self.make_client(failures=1)
+        self.assertEqual(client.read(5001, 2, 1, RegisterTypes.INPUT_REGISTER), [5000, 2, 1])
+        self.assertEqual((client.client.closes, client.client.connects), (1, 1))
+
+    def test_error_after_retry_propagates(self):
+        client = self.make_client(failures=2)
+        with self.assertRaises(ConnectionException):
+            client.read(5001, 2, 1, RegisterTypes.INPUT_REGISTER)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+import unittest
+from src.enums import DataType, _DTYPE_SIZE
+
+
+class TestDataTypeTables(unittest.TestCase):
+
+    def test_every_dtype_has_size(self):
+        self.assertEqual(set(_DTYPE_SIZE), set(DataType))
+
+    def test_f64(self):
+        self.assertEqual(DataType.F64.size, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,6 +29,18 @@ class TestLoaders(unittest.TestCase):
         self.assertIsInstance(load_options(
             json_rel_path=self.yaml_path), AppOptions)
 
+    def test_loader_rejects_unknown_suffix(self):
+        with self.assertRaises(ValueError):
+            load_options(json_rel_path="options.txt")
+
+        with self.assertRaises(FileNotFoundError):
+            load_options(json_rel_path="missing.json")
+
+    def test_loader_returns_independent_options(self):
+        opts = load_options(json_rel_path=self.yaml_path)
+        opts.mqtt_port = -1
+        self.assertNotEqual(load_options(json_rel_path=self.yaml_path).mqtt_port, -1)
+
     # Load and Validate
     def test_load_validate(self):
         """
@@ -0,0 +1,31 @@
+import unittest
+from types import SimpleNamespace
+from src.modbus_mqtt import MqttClient
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestPublishChangeDetection(unittest.TestCase):
+
+    def setUp(self):
+        options = SimpleNamespace(mqtt_user="user", mqtt_password="password",
+                                  mqtt_base_topic="modbus", mwtt_ha_discovery_topic="homeassistant")
+        self.mqtt_client = MqttClient(options)
+        self.published = []
+        self.mqtt_client.publish = lambda topic, payload, qos=0, retain=False: self.published.append((topic, payload))
+        self.server = SimpleNamespace(name="SG1")
+
+    def test_unchanged_values_skipped(self):
+        self.mqtt_client.publish_many([("Daily Power Yields", 7.3), ("Work State", 1)], self.server)
+        self.mqtt_client.publish_many([("Daily Power Yields", 0.1 * 73), ("Work State", 1)], self.server)
+        self.assertEqual(self.published, [("modbus/SG1/daily_power_yields/state", 7.3), ("modbus/SG1/work_state/state", 1)])
+
+    def test_changed_and_forced_values_published(self):
+        self.mqtt_client.publish_to_ha("Work State", 1, self.server)
+        self.mqtt_client.publish_to_ha("Work State", 2, self.server)
+        self.mqtt_client.publish_to_ha("Work State", 2, self.server, force=True)
+        self.assertEqual([payload for _, payload in self.published], [1, 2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
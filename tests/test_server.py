@@ -0,0 +1,172 @@
+import unittest
+from src.server import plan_reads, _rounding_digits, MAX_READ_COUNT, READ_ONCE
+from src.sungrow_inverter import SungrowInverter
+from src.client import SpoofClient, ModbusException
+from pymodbus.pdu import ExceptionResponse
+from src.enums import DataType, RegisterTypes, DeviceClass
+
+
+def param(addr, count=1, register_type=RegisterTypes.INPUT_REGISTER):
+    return {'addr': addr, 'count': count, 'dtype': DataType.U16, 'multiplier': 1, 'unit': '',
+            'device_class': DeviceClass.ENUM, 'register_type': register_type}
+
+
+class TestPlanReads(unittest.TestCase):
+
+    def test_contiguous_merged(self):
+        blocks = plan_reads({'a': param(5000), 'b': param(5001, 2), 'c': param(5003)})
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual((blocks[0].start, blocks[0].count), (5000, 4))
+        self.assertEqual([(e.name, e.offset) for e in blocks[0].entries], [('a', 0), ('b', 1), ('c', 3)])
+
+    def test_gap_splits(self):
+        params = {'a': param(5000), 'b': param(5003)}
+        self.assertEqual(len(plan_reads(params)), 2)
+        self.assertEqual(len(plan_reads(params, gap_threshold=2)), 1)
+
+    def test_register_types_split(self):
+        blocks = plan_reads({'a': param(5000), 'b': param(5001, register_type=RegisterTypes.HOLDING_REGISTER)})
+        self.assertEqual([b.register_type for b in blocks], [RegisterTypes.INPUT_REGISTER, RegisterTypes.HOLDING_REGISTER])
+
+    def test_overlapping_parameters(self):
+        blocks = plan_reads({'a': param(5081, 2), 'b': param(5081, 2), 'c': param(5083)})
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(blocks[0].count, 3)
+
+    def test_max_read_count(self):
+        params = {str(i): param(i) for i in range(1, 2 * MAX_READ_COUNT + 1)}
+        blocks = plan_reads(params)
+        self.assertEqual([b.count for b in blocks], [MAX_READ_COUNT, MAX_READ_COUNT])
+
+
+    def test_refresh_interval_splits(self):
+        static = dict(param(5001), refresh_interval=READ_ONCE)
+        blocks = plan_reads({'a': param(5000), 'b': static, 'c': param(5002)}, gap_threshold=1)
+        self.assertEqual([(b.start, b.count, b.refresh_interval) for b in blocks],
+                         [(5000, 3, 0), (5001, 1, READ_ONCE)])
+
+    def test_rounding_digits(self):
+        self.assertEqual(_rounding_digits('kW', DeviceClass.POWER), 1)
+        self.assertEqual(_rounding_digits('W', DeviceClass.POWER), 0)
+        self.assertEqual(_rounding_digits('°C', DeviceClass.TEMPERATURE), 2)
+        self.assertEqual(_rounding_digits('', None), 2)
+
+
+class RejectBlocksClient(SpoofClient):
+    """ Rejects reads of more than one register with Illegal Data Address """
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def read(self, address, count, slave_id, register_type):
+        self.reads += 1
+        if count > 1:
+            return ExceptionResponse(4, exception_code=2)
+        return super().read(address, count, slave_id, register_type)
+
+    def _handle_error_response(self, result):
+        pass
+
+
+class TestReadBlock(unittest.TestCase):
+
+    def test_rejected_block_is_split(self):
+        server = SungrowInverter("SG1", "1234", 1, RejectBlocksClient())
+        server._parameters = {'a': param(5000), 'b': param(5001)}
+        server._write_parameters = {}
+        server.build_read_plan()
+
+        block = server.read_plan[0]
+        self.assertEqual(server.read_block(block), [('a', 73), ('b', 73)])
+        self.assertEqual([(b.start, b.count) for b in server.read_plan], [(5000, 1), (5001, 1)])
+
+        server.connected_client.reads = 0
+        for block in server.read_plan:
+            server.read_block(block)
+        self.assertEqual(server.connected_client.reads, 2)
+
+
+class CountReadsClient(SpoofClient):
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+
+    def read(self, address, count, slave_id, register_type):
+        self.reads.append((address, count))
+        return super().read(address, count, slave_id, register_type)
+
+
+class TestReadRegistersBatch(unittest.TestCase):
+
+    def test_adjacent_parameters_read_once(self):
+        client = CountReadsClient()
+        server = SungrowInverter("SG1", "1234", 1, client)
+        server._parameters = {'a': param(5000), 'b': param(5001), 'c': param(5010)}
+        server._write_parameters = {}
+
+        self.assertEqual(server.read_registers_batch(['c', 'b', 'a']), [('a', 73), ('b', 73), ('c', 73)])
+        self.assertEqual(client.reads, [(5000, 2), (5010, 1)])
+
+    def test_unknown_parameter(self):
+        server = SungrowInverter("SG1", "1234", 1, SpoofClient())
+        with self.assertRaises(ValueError):
+            server.read_registers_batch(['not a parameter'])
+
+
+class TestDueBlocks(unittest.TestCase):
+
+    def test_refresh_intervals(self):
+        server = SungrowInverter("SG1", "1234", 1, SpoofClient())
+        server._parameters = {'a': param(5000), 'b': dict(param(5010), refresh_interval=10),
+                              'c': dict(param(5020), refresh_interval=READ_ONCE)}
+        server._write_parameters = {}
+        server.build_read_plan()
+
+        starts = lambda now: [b.start for b in server.due_blocks(now)]
+        self.assertEqual(starts(100.0), [5000, 5010, 5020])
+        self.assertEqual(starts(101.0), [5000])
+        self.assertEqual(starts(110.0), [5000, 5010])
+        self.assertEqual(starts(1e9), [5000, 5010])
+
+
+class RecordWritesClient(SpoofClient):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, values, address, slave_id, register_type):
+        self.writes.append((address, values))
+        return super().write(values, address, slave_id, register_type)
+
+
+class RejectCombinedWritesClient(RecordWritesClient):
+    def write(self, values, address, slave_id, register_type):
+        if len(values) > 1:
+            raise ModbusException("combined write rejected")
+        return super().write(values, address, slave_id, register_type)
+
+
+class TestWriteMany(unittest.TestCase):
+
+    def test_adjacent_writes_combined(self):
+        client = RecordWritesClient()
+        server = SungrowInverter("SG1", "1234", 1, client)
+        server.write_many([('power_limitation_setting', '50'), ('power_limitation_switch', '0xAA'),
+                           ('active_power_rising_gradient', '3')])
+        self.assertEqual(client.writes, [(5007, [0xAA, 500]), (31202, [3])])
+
+    def test_received_order_kept(self):
+        client = RecordWritesClient()
+        server = SungrowInverter("SG1", "1234", 1, client)
+        server.write_many([('active_power_rising_gradient', '3'), ('power_limitation_switch', '0xAA')])
+        self.assertEqual(client.writes, [(31202, [3]), (5007, [0xAA])])
+
+    def test_individual_writes_after_combined_write_fails(self):
+        client = RejectCombinedWritesClient()
+        server = SungrowInverter("SG1", "1234", 1, client)
+        server.write_many([('power_limitation_switch', '0xAA'), ('power_limitation_setting', '50')])
+        self.assertEqual(client.writes, [(5007, [0xAA]), (5008, [500])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from sungrow_inverter import SungrowInverter
+from src.sungrow_inverter import SungrowInverter
+from src.enums import DataType
 
 class TestSungrowInverter(unittest.TestCase):
 
@@ -16,8 +17,10 @@ class TestSungrowInverter(unittest.TestCase):
         self.assertEqual(SungrowInverter._decode_utf8([16706, 17220, 17734, 18248, 18762]), "ABCDEFGHIJ")
 
     def test_decode_s16(self):
-        # 2**15-1 == -32769
-        self.assertEqual(SungrowInverter._decode_s16([32768 - 1]), -32769)
+        # 2**15-1 == 32767
+        self.assertEqual(SungrowInverter._decode_s16([32768 - 1]), 32767)
+        # 2**15 == -32768
+        self.assertEqual(SungrowInverter._decode_s16([32768]), -32768)
         # 2**16-1 == -1
         self.assertEqual(SungrowInverter._decode_s16([2**16 - 1]), -1)
 
@@ -30,13 +33,13 @@ class TestSungrowInverter(unittest.TestCase):
         self.assertEqual(SungrowInverter._decode_s32([30587, 65535]), -34949)
 
     def test_encode_working(self):
-        self.assertEqual(SungrowInverter._encoded(2**16-1), [0, 0, 255, 255])
-        # self.assertEqual(SungrowInverter._encoded(float(2**16-1)), [0, 0, 255, 255])      # is_float
-        self.assertEqual(SungrowInverter._encoded(0), [0, 0, 0, 0])
-        
+        self.assertEqual(SungrowInverter._encoded(2**16-1, DataType.U16), [65535])
+        self.assertEqual(SungrowInverter._encoded(4.1, DataType.U16), [4])
+        self.assertEqual(SungrowInverter._encoded(0, DataType.U16), [0])
+
     def test_encode_breaking(self):
-        self.assertRaisesRegex(ValueError, r"ValueError: Cannot write negative value=(-?\d+) to U16 register\.", SungrowInverter._encoded(-1))
-        self.assertRaises(ValueError, r"ValueError: Cannot write negative value=(-?\d+) to U16 register\.", SungrowInverter._encoded(2**16))
+        self.assertRaisesRegex(ValueError, r"Cannot write negative value=-1 to U16 register\.", SungrowInverter._encoded, -1, DataType.U16)
+        self.assertRaisesRegex(ValueError, r"Cannot write value=65536 to U16 register\.", SungrowInverter._encoded, 2**16, DataType.U16)
 
     # def test_setup_valid_register_for_model(self):
     #     c = SungrowInverter(name="Sungrow Inverter 1",